@@ -0,0 +1 @@
+# Local benchmark harness for the scan pipelines
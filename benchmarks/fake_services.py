@@ -0,0 +1,412 @@
+import hashlib
+import os
+import random
+import shutil
+import threading
+import time
+import zipfile
+from botocore.exceptions import ClientError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Size of the buffer used to stream archives and request bodies
+STREAM_BUFFER_SIZE = 1024 * 1024
+
+# Thread-safe API call counter shared by the fake services
+class CallCounter:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def count(self, operation):
+        with self.lock:
+            self.counts[operation] = self.counts.get(operation, 0) + 1
+
+# Method to write a synthetic package archive of roughly the requested size, with source files, an image, and incompressible binary data
+def write_synthetic_archive(file_name, size_bytes, seed=0, planted_secret=False, flagged_binary=False):
+    generator = random.Random(seed)
+
+    # Fixed entry timestamps keep the archive bytes, and so its SHA256, identical for the same seed
+    def write_entry(archive, entry_name, content):
+        archive.writestr(zipfile.ZipInfo(entry_name, date_time=(2024, 1, 1, 0, 0, 0)), content)
+
+    with zipfile.ZipFile(file_name, "w", compression=zipfile.ZIP_STORED) as archive:
+        for index in range(20):
+            write_entry(archive, f"package-main/src/module_{index}.py", f"def handler_{index}(event):\n    return event\n" * 50)
+        write_entry(archive, "package-main/README.md", "# Synthetic benchmark package\n")
+        write_entry(archive, "package-main/docs/diagram.png", generator.randbytes(64 * 1024))
+
+        # A committed access key is rejected by the pre-scan, and a pickled model marks the package as higher risk
+        if planted_secret:
+            access_key_id = "AKIA" + "".join(generator.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ234567") for _ in range(16))
+            write_entry(archive, "package-main/src/settings.py", f"AWS_ACCESS_KEY_ID = '{access_key_id}'\n")
+        if flagged_binary:
+            write_entry(archive, "package-main/models/model.pkl", generator.randbytes(4 * 1024))
+
+        # Vendored binaries make up the rest of the requested size and are dropped by the scan archive filter
+        remaining = size_bytes - 64 * 1024
+        index = 0
+        while remaining > 0:
+            blob_size = min(remaining, STREAM_BUFFER_SIZE)
+            write_entry(archive, f"package-main/vendor/blob_{index}.bin", generator.randbytes(blob_size))
+            remaining -= blob_size
+            index += 1
+
+# Local HTTP server serving synthetic archives with ETag, HEAD, and Range support, and accepting presigned-style PUT uploads
+class LocalPackageServer:
+
+    def __init__(self, archive_directory, port=0):
+        self.archive_directory = archive_directory
+        self.calls = CallCounter()
+        self.bytes_served = 0
+        self.bytes_uploaded = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="package-server", daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _add_bytes(self, served=0, uploaded=0):
+        with self.lock:
+            self.bytes_served += served
+            self.bytes_uploaded += uploaded
+
+    def _handler_class(self):
+        package_server = self
+
+        class PackageRequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _archive_path(self):
+                return os.path.join(package_server.archive_directory, os.path.basename(self.path.split("?")[0]))
+
+            def _send_headers(self, status, length, etag=None, extra_headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/zip")
+                self.send_header("Content-Length", str(length))
+                self.send_header("Accept-Ranges", "bytes")
+                if etag:
+                    self.send_header("ETag", etag)
+                for name, value in (extra_headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+
+            def _serve(self, include_body):
+                package_server.calls.count(self.command)
+                path = self._archive_path()
+                if not os.path.isfile(path):
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                size = os.path.getsize(path)
+                etag = f'"{int(os.path.getmtime(path))}-{size}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send_headers(304, 0, etag)
+                    return
+
+                start = 0
+                status = 200
+                extra_headers = {}
+                range_header = self.headers.get("Range")
+                # A Range request with a stale If-Range validator gets the whole, current archive
+                if range_header and range_header.startswith("bytes=") and self.headers.get("If-Range", etag) == etag:
+                    start = int(range_header[len("bytes="):].split("-")[0])
+                    status = 206
+                    extra_headers["Content-Range"] = f"bytes {start}-{size - 1}/{size}"
+
+                self._send_headers(status, size - start, etag, extra_headers)
+                if not include_body:
+                    return
+
+                with open(path, "rb") as archive:
+                    archive.seek(start)
+                    shutil.copyfileobj(archive, self.wfile, STREAM_BUFFER_SIZE)
+                package_server._add_bytes(served=size - start)
+
+            def do_HEAD(self):
+                self._serve(include_body=False)
+
+            def do_GET(self):
+                self._serve(include_body=True)
+
+            def do_PUT(self):
+                package_server.calls.count("PUT")
+                received = 0
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    while True:
+                        chunk_size = int(self.rfile.readline().strip().split(b";")[0], 16)
+                        received += len(self.rfile.read(chunk_size + 2)) - 2
+                        if chunk_size == 0:
+                            break
+                else:
+                    remaining = int(self.headers.get("Content-Length", 0))
+                    while remaining > 0:
+                        chunk = self.rfile.read(min(remaining, STREAM_BUFFER_SIZE))
+                        if not chunk:
+                            break
+                        received += len(chunk)
+                        remaining -= len(chunk)
+
+                package_server._add_bytes(uploaded=received)
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        return PackageRequestHandler
+
+# Stand-in for the Amazon CodeGuru Security client with configurable scan latency and paginated findings
+class FakeCodeGuruSecurityClient:
+
+    def __init__(self, upload_url, scan_latency_seconds=5, findings_per_package=10, findings_page_size=None, reject_every=0):
+        self.upload_url = upload_url
+        self.scan_latency_seconds = scan_latency_seconds
+        self.findings_per_package = findings_per_package
+        self.findings_page_size = findings_page_size
+        self.reject_every = reject_every
+        self.calls = CallCounter()
+        self.lock = threading.Lock()
+        self.scans = {}
+        self.scan_count = 0
+        self.scan_types = CallCounter()
+
+    def create_upload_url(self, scanName):
+        self.calls.count("create_upload_url")
+        return {
+            "s3Url": f"{self.upload_url}/upload/{scanName}",
+            "requestHeaders": {"x-amz-server-side-encryption": "aws:kms"},
+            "codeArtifactId": f"artifact-{scanName}",
+        }
+
+    def create_scan(self, resourceId, scanName, scanType="Standard", analysisType="Security", **kwargs):
+        self.calls.count("create_scan")
+        with self.lock:
+            self.scan_count += 1
+            rejected = bool(self.reject_every) and self.scan_count % self.reject_every == 0
+            run_id = f"run-{scanName}-{self.scan_count}"
+            self.scans[scanName] = {"run_id": run_id, "started_at": time.monotonic(), "rejected": rejected, "scan_type": scanType}
+        self.scan_types.count(scanType)
+        return {"scanName": scanName, "runId": run_id, "scanState": "InProgress", "resourceId": resourceId}
+
+    def get_scan(self, scanName, runId=None):
+        self.calls.count("get_scan")
+        scan = self.scans[scanName]
+        latency = self.scan_latency_seconds / 2 if scan["scan_type"] == "Express" else self.scan_latency_seconds
+        finished = time.monotonic() - scan["started_at"] >= latency
+        return {"scanName": scanName, "runId": scan["run_id"], "scanState": "Successful" if finished else "InProgress"}
+
+    def _finding(self, scan_name, index, severity):
+        return {
+            "id": f"{scan_name}-{index}",
+            "title": f"Synthetic finding {index % 5}",
+            "description": "Synthetic finding generated by the benchmark harness.",
+            "severity": severity,
+            "detectorId": f"python/synthetic-{index % 5}",
+            "remediation": {"recommendation": {"text": "Review the flagged code."}},
+            "vulnerability": {"filePath": {"path": f"package-main/src/module_{index % 20}.py"}},
+            "referenceUrls": ["https://docs.aws.amazon.com/codeguru/latest/security-ug/"],
+        }
+
+    def get_findings(self, scanName, maxResults=20, status="Open", nextToken=None):
+        self.calls.count("get_findings")
+        scan = self.scans[scanName]
+        page_size = min(maxResults, self.findings_page_size or maxResults)
+        start = int(nextToken or 0)
+        end = min(start + page_size, self.findings_per_package)
+
+        # Rejected scans carry a single High finding on their last page
+        findings = [
+            self._finding(scanName, index, "High" if scan["rejected"] and index == self.findings_per_package - 1 else "Low")
+            for index in range(start, end)
+        ]
+        response = {"findings": findings}
+        if end < self.findings_per_package:
+            response["nextToken"] = str(end)
+        return response
+
+# Stand-in for the AWS CodeArtifact client that streams and verifies published assets and keeps the assets of each package version
+class FakeCodeArtifactClient:
+
+    def __init__(self):
+        self.calls = CallCounter()
+        self.bytes_published = 0
+        self.lock = threading.Lock()
+        self.package_versions = {}
+
+    def _package_version(self, operation_name, namespace, package, packageVersion):
+        package_version = self.package_versions.get((namespace, package, packageVersion))
+        if not package_version:
+            raise ClientError({"Error": {"Code": "ResourceNotFoundException", "Message": f"Package version {packageVersion} not found"}}, operation_name)
+        return package_version
+
+    def describe_package_version(self, domain, repository, format, namespace, package, packageVersion, **kwargs):
+        self.calls.count("describe_package_version")
+        with self.lock:
+            package_version = self._package_version("DescribePackageVersion", namespace, package, packageVersion)
+            return {"packageVersion": {"format": format, "namespace": namespace, "packageName": package, "version": packageVersion, "status": package_version["status"]}}
+
+    def list_package_version_assets(self, domain, repository, format, namespace, package, packageVersion, **kwargs):
+        self.calls.count("list_package_version_assets")
+        with self.lock:
+            package_version = self._package_version("ListPackageVersionAssets", namespace, package, packageVersion)
+            return {"format": format, "namespace": namespace, "package": package, "version": packageVersion, "assets": list(package_version["assets"].values())}
+
+    def publish_package_version(self, domain, repository, format, namespace, package, packageVersion, assetName, assetContent, assetSHA256, unfinished=False, **kwargs):
+        self.calls.count("publish_package_version")
+        sha256 = hashlib.sha256()
+        size = 0
+        for chunk in iter(lambda: assetContent.read(STREAM_BUFFER_SIZE), b""):
+            sha256.update(chunk)
+            size += len(chunk)
+
+        if sha256.hexdigest() != assetSHA256:
+            raise ValueError(f"Asset {assetName} SHA256 mismatch")
+        with self.lock:
+            # Like CodeArtifact, a published version and an asset name already in the version cannot be published again
+            package_version = self.package_versions.setdefault((namespace, package, packageVersion), {"status": "Unfinished", "assets": {}})
+            if package_version["status"] == "Published" or assetName in package_version["assets"]:
+                raise ClientError({"Error": {"Code": "ConflictException", "Message": f"Asset {assetName} already exists in version {packageVersion}"}}, "PublishPackageVersion")
+            package_version["assets"][assetName] = {"name": assetName, "size": size, "hashes": {"SHA-256": assetSHA256}}
+            if not unfinished:
+                package_version["status"] = "Published"
+            self.bytes_published += size
+
+        return {
+            "format": format,
+            "namespace": namespace,
+            "package": package,
+            "version": packageVersion,
+            "versionRevision": "benchmark",
+            "status": "Unfinished" if unfinished else "Published",
+            "asset": {"name": assetName, "size": size, "hashes": {"SHA-256": assetSHA256}},
+        }
+
+# Stand-in for the Amazon SNS client that records message sizes
+class FakeSnsClient:
+
+    def __init__(self):
+        self.calls = CallCounter()
+        self.message_sizes = []
+
+    def publish(self, TopicArn, Message, Subject=None, **kwargs):
+        self.calls.count("publish")
+        self.message_sizes.append(len(Message.encode("utf-8")))
+        return {"MessageId": f"message-{len(self.message_sizes)}"}
+
+# Stand-in for the Amazon S3 client used for the run ledger and spilled notification reports
+class FakeS3Client:
+
+    def __init__(self):
+        self.calls = CallCounter()
+        self.objects = {}
+
+    def upload_file(self, Filename, Bucket, Key, **kwargs):
+        self.calls.count("upload_file")
+        with open(Filename, "rb") as file:
+            self.objects[(Bucket, Key)] = file.read()
+
+    def download_file(self, Bucket, Key, Filename, **kwargs):
+        self.calls.count("download_file")
+        if (Bucket, Key) not in self.objects:
+            raise FileNotFoundError(f"s3://{Bucket}/{Key} does not exist")
+        with open(Filename, "wb") as file:
+            file.write(self.objects[(Bucket, Key)])
+
+# Minimal object exposing attributes, used for the fake PyGithub return values
+class FakeGithubObject:
+
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+# Stand-in for a PyGithub repository covering the branch, Contents API, and Git Data API calls used by the scripts
+class FakeGithubRepository:
+
+    def __init__(self, full_name, calls):
+        self.full_name = full_name
+        self.default_branch = "main"
+        self.calls = calls
+        self.lock = threading.Lock()
+        self.refs = {"main": "commit-0"}
+        self.sequence = 0
+        self.bytes_committed = 0
+
+    def _next_sha(self, prefix):
+        with self.lock:
+            self.sequence += 1
+            return f"{prefix}-{self.sequence}"
+
+    def _ref(self, branch_name):
+        repository = self
+        return FakeGithubObject(
+            ref=f"refs/heads/{branch_name}",
+            object=FakeGithubObject(sha=self.refs[branch_name]),
+            edit=lambda sha, force=False: repository._set_ref(branch_name, sha),
+        )
+
+    def _set_ref(self, branch_name, sha):
+        self.calls.count("update_ref")
+        self.refs[branch_name] = sha
+
+    def get_branch(self, branch_name):
+        self.calls.count("get_branch")
+        if branch_name not in self.refs:
+            raise LookupError(f"Branch {branch_name} not found")
+        return FakeGithubObject(name=branch_name, commit=FakeGithubObject(sha=self.refs[branch_name]))
+
+    def get_git_ref(self, ref):
+        self.calls.count("get_git_ref")
+        branch_name = ref.split("heads/", 1)[-1]
+        if branch_name not in self.refs:
+            raise LookupError(f"Reference {ref} not found")
+        return self._ref(branch_name)
+
+    def create_git_ref(self, ref, sha):
+        self.calls.count("create_git_ref")
+        self.refs[ref.split("refs/heads/", 1)[-1]] = sha
+        return FakeGithubObject(ref=ref)
+
+    def create_git_blob(self, content, encoding):
+        self.calls.count("create_git_blob")
+        with self.lock:
+            self.bytes_committed += len(content)
+        return FakeGithubObject(sha=self._next_sha("blob"))
+
+    def get_git_commit(self, sha):
+        self.calls.count("get_git_commit")
+        return FakeGithubObject(sha=sha, tree=FakeGithubObject(sha=f"tree-of-{sha}"))
+
+    def create_git_tree(self, tree, base_tree=None):
+        self.calls.count("create_git_tree")
+        return FakeGithubObject(sha=self._next_sha("tree"))
+
+    def create_git_commit(self, message, tree, parents, **kwargs):
+        self.calls.count("create_git_commit")
+        return FakeGithubObject(sha=self._next_sha("commit"), message=message)
+
+# Stand-in for the PyGithub entry point
+class FakeGithub:
+
+    calls = CallCounter()
+    repositories = {}
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def get_repo(self, full_name):
+        FakeGithub.calls.count("get_repo")
+        return FakeGithub.repositories.setdefault(full_name, FakeGithubRepository(full_name, FakeGithub.calls))
@@ -0,0 +1,262 @@
+import argparse
+import contextlib
+import json
+import os
+import resource
+import runpy
+import sys
+import tempfile
+import time
+from unittest import mock
+import boto3
+import github
+from benchmarks.fake_services import (
+    FakeCodeArtifactClient,
+    FakeCodeGuruSecurityClient,
+    FakeGithub,
+    FakeS3Client,
+    FakeSnsClient,
+    LocalPackageServer,
+    write_synthetic_archive,
+)
+
+# Repository root holding the pipeline scripts
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Pipeline scripts the benchmark can drive
+PIPELINE_SCRIPTS = {
+    "codeartifact": "codeartifact-codeguru-security-scan.py",
+    "github": "github-codeguru-security-scan.py",
+}
+
+# Method to parse the benchmark command line options
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="End-to-end throughput benchmark of the scan pipelines against local stand-in services")
+    parser.add_argument("--pipeline", choices=sorted(PIPELINE_SCRIPTS), default="codeartifact", help="pipeline script to benchmark")
+    parser.add_argument("--command", choices=("scan", "publish"), default="publish", help="build script command; scan leaves approved packages unpublished")
+    parser.add_argument("--publishers", help="value of the PackagePublishers environment variable, for example codeartifact,github")
+    parser.add_argument("--packages", type=int, default=20, help="number of external packages in the request manifest")
+    parser.add_argument("--manifest-format", choices=("csv", "jsonl"), default="csv", help="format of the request manifest")
+    parser.add_argument("--requestors", type=int, default=0, help="spread the requests over this many requestor email addresses, with rising priorities")
+    parser.add_argument("--archive-size-mb", type=float, default=5, help="size of each synthetic package archive")
+    parser.add_argument("--scan-latency", type=float, default=2, help="seconds each fake CodeGuru Security scan stays in progress")
+    parser.add_argument("--findings", type=int, default=25, help="findings returned for each scan")
+    parser.add_argument("--findings-page-size", type=int, default=10, help="findings returned per get_findings page")
+    parser.add_argument("--reject-every", type=int, default=4, help="give every Nth scan a blocking finding (0 approves every package)")
+    parser.add_argument("--secret-every", type=int, default=0, help="plant an AWS access key in every Nth archive, which the pre-scan rejects")
+    parser.add_argument("--flag-every", type=int, default=0, help="add a pickled model to every Nth archive, which the pre-scan flags as higher risk")
+    parser.add_argument("--concurrency", type=int, default=4, help="value of the MaxConcurrency environment variable")
+    parser.add_argument("--poll-interval", type=float, default=0.25, help="value of the ScanPollInitialSeconds environment variable")
+    parser.add_argument("--extra-env", action="append", default=[], metavar="NAME=VALUE", help="additional environment variable for the pipeline script")
+    parser.add_argument("--work-directory", help="reuse this directory between runs, keeping the run ledger and downloaded archives")
+    parser.add_argument("--port", type=int, default=0, help="port of the local package server; fix it so package URLs stay the same between runs")
+    parser.add_argument("--output", help="write the benchmark report to this JSON file")
+    return parser.parse_args()
+
+# Method to return the nearest-rank percentile of a list of values
+def percentile(values, percent):
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+
+    index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+# Method to collect the per-stage durations in milliseconds from the EMF records written by a pipeline run
+def read_stage_durations(metrics_file):
+    stage_durations = {}
+    if not os.path.exists(metrics_file):
+        return stage_durations
+
+    with open(metrics_file) as file:
+        for line in file:
+            record = json.loads(line)
+            for metric in record["_aws"]["CloudWatchMetrics"][0]["Metrics"]:
+                if metric["Name"].endswith("Duration"):
+                    stage_durations.setdefault(metric["Name"][:-len("Duration")], []).append(record[metric["Name"]])
+
+    return stage_durations
+
+# Method to read the pipelines that actually ran, such as "codeartifact+github" or "scan", from the Pipeline field of the EMF records
+def read_pipeline_names(metrics_file):
+    pipeline_names = []
+    if not os.path.exists(metrics_file):
+        return pipeline_names
+
+    with open(metrics_file) as file:
+        for line in file:
+            pipeline_name = json.loads(line).get("Pipeline")
+            if pipeline_name and pipeline_name not in pipeline_names:
+                pipeline_names.append(pipeline_name)
+
+    return pipeline_names
+
+# Method to run one pipeline script in-process against the stand-in services and return its report
+def run_benchmark(arguments, work_directory):
+    archive_directory = os.path.join(work_directory, "archives")
+    os.makedirs(archive_directory, exist_ok=True)
+
+    print(f"Writing {arguments.packages} synthetic archives of {arguments.archive_size_mb} MB...")
+    for index in range(arguments.packages):
+        # Archives left by an earlier run in the same work directory are kept so their ETags stay the same
+        archive_file_name = os.path.join(archive_directory, f"package-{index}.zip")
+        if not os.path.exists(archive_file_name):
+            write_synthetic_archive(
+                archive_file_name,
+                int(arguments.archive_size_mb * 1024 * 1024),
+                seed=index,
+                planted_secret=bool(arguments.secret_every) and (index + 1) % arguments.secret_every == 0,
+                flagged_binary=bool(arguments.flag_every) and (index + 1) % arguments.flag_every == 0,
+            )
+
+    package_server = LocalPackageServer(archive_directory, arguments.port).start()
+    codeguru_security_client = FakeCodeGuruSecurityClient(
+        package_server.url,
+        scan_latency_seconds=arguments.scan_latency,
+        findings_per_package=arguments.findings,
+        findings_page_size=arguments.findings_page_size,
+        reject_every=arguments.reject_every,
+    )
+    codeartifact_client = FakeCodeArtifactClient()
+    sns_client = FakeSnsClient()
+    s3_client = FakeS3Client()
+    fake_clients = {"codeguru-security": codeguru_security_client, "codeartifact": codeartifact_client, "sns": sns_client, "s3": s3_client}
+
+    manifest_name = f"external-package-request.{arguments.manifest_format}"
+    with open(os.path.join(work_directory, manifest_name), "w") as manifest:
+        for index in range(arguments.packages):
+            request = {"name": f"package-{index}", "url": f"{package_server.url}/package-{index}.zip"}
+            if arguments.requestors:
+                # Later requests get higher priorities, so the scheduler runs the manifest in reverse
+                request.update(priority=index, requestor=f"requestor-{index % arguments.requestors}@example.com")
+
+            if arguments.manifest_format == "jsonl":
+                manifest.write(json.dumps(request) + "\n")
+            elif arguments.requestors:
+                manifest.write(f"{request['name']},{request['url']},,{request['priority']},,{request['requestor']}\n")
+            else:
+                manifest.write(f"{request['name']},{request['url']}\n")
+
+    environment = {
+        "ExampleDomain": "benchmark-domain",
+        "InternalRepository": "benchmark-repository",
+        "SNSTopic": "arn:aws:sns:us-east-1:111122223333:benchmark",
+        "PrivateGitHubOwner": "benchmark-owner",
+        "PrivateGitHubRepo": "benchmark-repository",
+        "PrivateGitHubToken": "benchmark-token",
+        "MaxConcurrency": str(arguments.concurrency),
+        "ScanPollInitialSeconds": str(arguments.poll_interval),
+        "ScanPollMaxSeconds": str(max(arguments.poll_interval, 1)),
+        "ScanCachePath": "",
+        "MetricsFile": "scan-metrics.jsonl",
+    }
+    if arguments.publishers:
+        environment["PackagePublishers"] = arguments.publishers
+    environment.update(value.split("=", 1) for value in arguments.extra_env)
+
+    script_path = os.path.join(REPOSITORY_ROOT, PIPELINE_SCRIPTS[arguments.pipeline])
+    log_file_name = os.path.join(work_directory, "pipeline.log")
+    metrics_file_name = os.path.join(work_directory, "scan-metrics.jsonl")
+    if os.path.exists(metrics_file_name):
+        os.remove(metrics_file_name)
+    previous_directory = os.getcwd()
+    os.chdir(work_directory)
+
+    try:
+        with mock.patch.dict(os.environ, environment), \
+                mock.patch.object(boto3, "client", lambda service_name, **kwargs: fake_clients[service_name]), \
+                mock.patch.object(github, "Github", FakeGithub), \
+                mock.patch.object(sys, "argv", [script_path, arguments.command, "--requests", manifest_name]), \
+                open(log_file_name, "w") as log_file, \
+                contextlib.redirect_stdout(log_file):
+            start = time.perf_counter()
+            try:
+                runpy.run_path(script_path, run_name="__main__")
+            except SystemExit as exit_status:
+                # The build scripts exit with the command status
+                if exit_status.code:
+                    raise
+            wall_seconds = time.perf_counter() - start
+    finally:
+        os.chdir(previous_directory)
+        package_server.stop()
+
+    stage_durations = read_stage_durations(metrics_file_name)
+    # The publishers come from the metrics records, since PackagePublishers or the scan command can differ from the script's default
+    publishers = read_pipeline_names(metrics_file_name) or [environment.get("PackagePublishers", arguments.pipeline)]
+    github_repositories = list(FakeGithub.repositories.values())
+
+    return {
+        "pipeline": arguments.pipeline,
+        "publishers": ", ".join(publishers),
+        "command": arguments.command,
+        "packages": arguments.packages,
+        "archive_size_mb": arguments.archive_size_mb,
+        "concurrency": arguments.concurrency,
+        "wall_seconds": round(wall_seconds, 2),
+        "packages_per_hour": round(arguments.packages / wall_seconds * 3600, 1) if wall_seconds else 0,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages_ms": {
+            stage_name: {"p50": percentile(durations, 50), "p95": percentile(durations, 95), "count": len(durations)}
+            for stage_name, durations in stage_durations.items()
+        },
+        "api_calls": {
+            "codeguru_security": codeguru_security_client.calls.counts,
+            "codeartifact": codeartifact_client.calls.counts,
+            "sns": sns_client.calls.counts,
+            "s3": s3_client.calls.counts,
+            "github": FakeGithub.calls.counts,
+            "http": package_server.calls.counts,
+        },
+        "scan_types": codeguru_security_client.scan_types.counts,
+        "bytes": {
+            "downloaded": package_server.bytes_served,
+            "uploaded_for_scan": package_server.bytes_uploaded,
+            "published_codeartifact": codeartifact_client.bytes_published,
+            "committed_github": sum(repository.bytes_committed for repository in github_repositories),
+            "sns_messages": sum(sns_client.message_sizes),
+        },
+        "log_file": log_file_name,
+    }
+
+# Method to print the benchmark report as a readable summary
+def print_report(report):
+    print(f"\nPipeline: {report['publishers']}, {report['command']} command of the {report['pipeline']} script ({report['packages']} packages of {report['archive_size_mb']} MB, concurrency {report['concurrency']})")
+    print(f"Wall time: {report['wall_seconds']} s")
+    print(f"Throughput: {report['packages_per_hour']} packages/hour")
+    print(f"Peak RSS: {report['peak_rss_mb']} MB")
+
+    print("\nStage latency (ms):")
+    width = max([len(stage_name) for stage_name in report["stages_ms"]] + [5])
+    print(f"  {'stage'.ljust(width)}  {'p50':>10}  {'p95':>10}  {'count':>6}")
+    for stage_name, stage in report["stages_ms"].items():
+        print(f"  {stage_name.ljust(width)}  {stage['p50']:>10}  {stage['p95']:>10}  {stage['count']:>6}")
+
+    print("\nAPI calls:")
+    for service, counts in report["api_calls"].items():
+        if counts:
+            print(f"  {service}: " + ", ".join(f"{operation}={count}" for operation, count in sorted(counts.items())))
+
+    if report["scan_types"]:
+        print("\nCodeGuru Security scan types: " + ", ".join(f"{scan_type}={count}" for scan_type, count in sorted(report["scan_types"].items())))
+
+    print("\nBytes moved:")
+    for name, value in report["bytes"].items():
+        print(f"  {name}: {value}")
+    print(f"\nPipeline output: {report['log_file']}")
+
+def main():
+    arguments = parse_arguments()
+    work_directory = arguments.work_directory or tempfile.mkdtemp(prefix="scan-benchmark-")
+    os.makedirs(work_directory, exist_ok=True)
+
+    report = run_benchmark(arguments, work_directory)
+    print_report(report)
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Benchmark report written to {arguments.output}")
+
+if __name__ == "__main__":
+    sys.exit(main())
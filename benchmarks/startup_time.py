@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Repository root holding the pipeline scripts
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Work the original scripts did before processing the first package: module-level imports, the GitHub client, and the boto3 clients
+ORIGINAL_CODEARTIFACT_STARTUP = (
+    "import os, time, boto3, requests, csv, re, hashlib\n"
+    "from datetime import datetime\n"
+    "from dateutil import tz\n"
+    "codeartifact_client = boto3.client('codeartifact')\n"
+    "codeguru_security_client = boto3.client('codeguru-security')\n"
+    "sns_client = boto3.client('sns')\n"
+)
+ORIGINAL_GITHUB_STARTUP = (
+    "import os, re, csv, json, time, boto3, base64, requests\n"
+    "from dateutil import tz\n"
+    "from datetime import datetime\n"
+    "from github import Github\n"
+    "github = Github(os.environ.get('PrivateGitHubToken'))\n"
+    "codeartifact_client = boto3.client('codeartifact')\n"
+    "codeguru_security_client = boto3.client('codeguru-security')\n"
+    "sns_client = boto3.client('sns')\n"
+)
+
+# Work the build scripts now do before processing the first package: settings, manifest, and the pipeline with its clients deferred
+PIPELINE_STARTUP = (
+    "from scan_pipeline.manifest import read_package_requests\n"
+    "from scan_pipeline.pipeline import create_pipeline\n"
+    "from scan_pipeline.settings import PipelineSettings\n"
+    "settings = PipelineSettings(default_publishers=('codeartifact', 'github'))\n"
+    "read_package_requests()\n"
+    "create_pipeline(settings)\n"
+)
+
+# Method to parse the benchmark command line options
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Startup time of the build scripts compared with the work the original scripts did before the first package")
+    parser.add_argument("--runs", type=int, default=10, help="runs of each command; the median is reported")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    return parser.parse_args()
+
+# Method to build the commands to time, each run from the work directory holding a package request file
+def startup_commands():
+    codeartifact_script = os.path.join(REPOSITORY_ROOT, "codeartifact-codeguru-security-scan.py")
+    github_script = os.path.join(REPOSITORY_ROOT, "github-codeguru-security-scan.py")
+
+    return {
+        "python interpreter": [sys.executable, "-c", "pass"],
+        "original codeartifact script startup": [sys.executable, "-c", ORIGINAL_CODEARTIFACT_STARTUP],
+        "original github script startup": [sys.executable, "-c", ORIGINAL_GITHUB_STARTUP],
+        "codeartifact script --help": [sys.executable, codeartifact_script, "--help"],
+        "codeartifact script validate": [sys.executable, codeartifact_script, "validate"],
+        "github script publish --dry-run": [sys.executable, github_script, "publish", "--dry-run"],
+        "pipeline startup, both publishers": [sys.executable, "-c", PIPELINE_STARTUP],
+    }
+
+# Method to time each command over several runs and return the median and fastest wall time in milliseconds
+def time_commands(commands, runs, work_directory):
+    environment = dict(
+        os.environ,
+        PYTHONPATH=REPOSITORY_ROOT,
+        AWS_DEFAULT_REGION="us-east-1",
+        ExampleDomain="benchmark-domain",
+        InternalRepository="benchmark-repository",
+        SNSTopic="arn:aws:sns:us-east-1:111122223333:benchmark",
+        PrivateGitHubOwner="benchmark-owner",
+        PrivateGitHubRepo="benchmark-repository",
+        PrivateGitHubToken="benchmark-token",
+        RunLedgerPath="",
+        ScanCachePath="",
+    )
+    results = {}
+
+    for name, command in commands.items():
+        durations = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=work_directory, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            durations.append((time.perf_counter() - start) * 1000)
+        results[name] = {"median_ms": round(statistics.median(durations), 1), "min_ms": round(min(durations), 1)}
+
+    return results
+
+def main():
+    arguments = parse_arguments()
+
+    with tempfile.TemporaryDirectory(prefix="scan-startup-") as work_directory:
+        with open(os.path.join(work_directory, "external-package-request.csv"), "w") as manifest:
+            manifest.write("example-package,https://github.com/example/example-package/archive/refs/heads/main.zip\n")
+        results = time_commands(startup_commands(), arguments.runs, work_directory)
+
+    width = max(len(name) for name in results)
+    print(f"Startup time over {arguments.runs} runs (ms):")
+    print(f"  {'command'.ljust(width)}  {'median':>8}  {'min':>8}")
+    for name, result in results.items():
+        print(f"  {name.ljust(width)}  {result['median_ms']:>8}  {result['min_ms']:>8}")
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Startup report written to {arguments.output}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Shared building blocks for the external package repository security scan scripts
@@ -0,0 +1,6 @@
+import sys
+from scan_pipeline.cli import main
+
+# Entry point that runs the publishers named in the PackagePublishers environment variable, for example "codeartifact,github"
+if __name__ == "__main__":
+    sys.exit(main(prog="python3 -m scan_pipeline"))
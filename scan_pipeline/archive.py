@@ -0,0 +1,27 @@
+import base64
+import hashlib
+
+# Chunk size used when base64-encoding archives; it must be a multiple of 3 bytes
+BASE64_CHUNK_SIZE = 3 * 1024 * 1024
+
+# Method to base64-encode an archive in chunks without holding a raw copy of the whole file in memory
+def read_file_base64(file_name, chunk_size=BASE64_CHUNK_SIZE):
+    encoded_chunks = []
+
+    with open(file_name, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            encoded_chunks.append(base64.b64encode(chunk).decode('utf-8'))
+
+    return "".join(encoded_chunks)
+
+# Method to compute the SHA256 hash and size of a file by streaming it in chunks
+def file_sha256(file_name, chunk_size=BASE64_CHUNK_SIZE):
+    sha256 = hashlib.sha256()
+    size = 0
+
+    with open(file_name, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            sha256.update(chunk)
+            size += len(chunk)
+
+    return sha256.hexdigest(), size
@@ -0,0 +1,115 @@
+import json
+import time
+from scan_pipeline.sqlite_store import SqliteStore
+
+# Interface for scan result cache backends keyed by archive SHA256; an S3 or DynamoDB backend implements the same methods
+class ScanResultCache:
+
+    # Method to return the cached scan result for an archive hash, or None on a miss or expired entry
+    def get(self, sha256):
+        raise NotImplementedError
+
+    # Method to store the scan verdict, findings, CodeGuru Security scan type, and published version for an archive hash
+    def put(self, sha256, verdict, findings, scan_type, published_version=None):
+        raise NotImplementedError
+
+    # Method to record the version an already cached archive was published as
+    def set_published_version(self, sha256, published_version):
+        raise NotImplementedError
+
+# Local SQLite scan result cache with a TTL and least recently used eviction once max_entries is exceeded
+class SqliteScanResultCache(SqliteStore, ScanResultCache):
+
+    def __init__(self, path, ttl_seconds=7 * 24 * 60 * 60, max_entries=1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        super().__init__(
+            path,
+            """CREATE TABLE IF NOT EXISTS scan_results (
+                sha256 TEXT PRIMARY KEY,
+                verdict TEXT NOT NULL,
+                findings TEXT NOT NULL,
+                scan_type TEXT,
+                published_version TEXT,
+                scanned_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )""",
+        )
+        # Caches written before the scan type was stored get the column; their entries have no scan type and are not reused
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(scan_results)")]
+        if "scan_type" not in columns:
+            self.connection.execute("ALTER TABLE scan_results ADD COLUMN scan_type TEXT")
+            self.connection.commit()
+
+    def get(self, sha256):
+        now = time.time()
+
+        with self.lock:
+            self.connection.execute("DELETE FROM scan_results WHERE scanned_at < ?", (now - self.ttl_seconds,))
+            row = self.connection.execute(
+                "SELECT verdict, findings, scan_type, published_version, scanned_at FROM scan_results WHERE sha256 = ?",
+                (sha256,),
+            ).fetchone()
+
+            if row:
+                self.connection.execute("UPDATE scan_results SET last_used_at = ? WHERE sha256 = ?", (now, sha256))
+            self.connection.commit()
+
+        if not row:
+            return None
+
+        verdict, findings, scan_type, published_version, scanned_at = row
+        return {
+            "sha256": sha256,
+            "verdict": verdict,
+            "findings": json.loads(findings),
+            "scan_type": scan_type,
+            "published_version": published_version,
+            "scanned_at": scanned_at,
+        }
+
+    def put(self, sha256, verdict, findings, scan_type, published_version=None):
+        now = time.time()
+        # Findings returned by boto3 contain datetime values, which are stored as strings
+        findings_json = json.dumps(findings, default=str)
+
+        with self.lock:
+            # Keep the scan time and published version of an existing entry; INSERT OR REPLACE also works on older SQLite builds
+            existing = self.connection.execute(
+                "SELECT published_version, scanned_at FROM scan_results WHERE sha256 = ?",
+                (sha256,),
+            ).fetchone()
+            scanned_at = now
+            if existing:
+                published_version = published_version or existing[0]
+                scanned_at = existing[1]
+
+            self.connection.execute(
+                """INSERT OR REPLACE INTO scan_results (sha256, verdict, findings, scan_type, published_version, scanned_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (sha256, verdict, findings_json, scan_type, published_version, scanned_at, now),
+            )
+
+            # Evict the least recently used entries beyond the size bound
+            self.connection.execute(
+                """DELETE FROM scan_results WHERE sha256 IN (
+                    SELECT sha256 FROM scan_results ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,),
+            )
+            self.connection.commit()
+
+    def set_published_version(self, sha256, published_version):
+        with self.lock:
+            self.connection.execute(
+                "UPDATE scan_results SET published_version = ? WHERE sha256 = ?",
+                (published_version, sha256),
+            )
+            self.connection.commit()
+
+# Method to create the scan result cache from environment configuration; an empty path disables caching
+def create_scan_result_cache(path, ttl_seconds, max_entries):
+    if not path or ttl_seconds <= 0 or max_entries <= 0:
+        return None
+
+    return SqliteScanResultCache(path, ttl_seconds=ttl_seconds, max_entries=max_entries)
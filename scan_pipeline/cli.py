@@ -0,0 +1,107 @@
+import argparse
+import os
+import sys
+
+# Commands of the build scripts; publish runs when no command is given so the CodeBuild build commands stay unchanged
+COMMANDS = ("validate", "scan", "publish")
+
+# Method to build the command line parser shared by both build scripts and python3 -m scan_pipeline
+def build_parser(prog=None):
+    from scan_pipeline.manifest import DEFAULT_REQUESTS_FILE
+
+    parser = argparse.ArgumentParser(prog=prog, description="Security review for requested external package repositories. Runs the publish command when no command is given.")
+    subparsers = parser.add_subparsers(dest="command", metavar="{validate,scan,publish}")
+
+    request_options = argparse.ArgumentParser(add_help=False)
+    request_options.add_argument("-r", "--requests", default=DEFAULT_REQUESTS_FILE, metavar="PATH", help=f"package request file, CSV or JSON lines (.jsonl) (default: {DEFAULT_REQUESTS_FILE})")
+    request_options.add_argument("--publishers", help="comma-separated publishers, overriding the PackagePublishers environment variable")
+
+    run_options = argparse.ArgumentParser(add_help=False)
+    run_options.add_argument("--dry-run", action="store_true", help="validate and print what would happen to each package without calling AWS or GitHub")
+
+    subparsers.add_parser("validate", parents=[request_options], help="check the settings and package requests without calling AWS or GitHub")
+    subparsers.add_parser("scan", parents=[request_options, run_options], help="download and scan the requested packages and notify rejections, without publishing")
+    subparsers.add_parser("publish", parents=[request_options, run_options], help="scan the requested packages and publish the approved ones (default)")
+    return parser
+
+# Method to describe what a run would do with a package, from its run ledger entry
+def describe_ledger_entry(ledger_entry, upstream_probe):
+    if not ledger_entry:
+        return "new request"
+
+    stages = ledger_entry["stages"]
+    if "completed" in stages:
+        checked = "probed" if upstream_probe else "downloaded again"
+        return f"{checked} and skipped unless the archive changed, completed by an earlier run: {stages['completed'].get('outcome')}"
+
+    last_stage = max(stages, key=lambda stage_name: stages[stage_name]["completed_at"])
+    return f"resumes after the {last_stage} stage of an earlier run"
+
+# Method to print what a scan or publish run would do with each package, reading only the local run ledger
+def print_package_plan(settings, packages):
+    from scan_pipeline.ledger import SqliteRunLedger
+
+    run_ledger = None
+    if settings.run_ledger_path and os.path.exists(settings.run_ledger_path):
+        run_ledger = SqliteRunLedger(settings.run_ledger_path)
+    elif settings.run_ledger_s3_uri:
+        print(f"Dry run does not restore the run ledger from {settings.run_ledger_s3_uri}; every request is shown as new")
+
+    destinations = ", ".join(settings.publishers) or "no publishers (scan only)"
+    print(f"\nDry run: {len(packages)} packages would be scanned in priority order, publishing approved packages to {destinations}")
+    for package in sorted(packages, key=lambda package: -package["priority"]):
+        ledger_entry = run_ledger.get(package["name"], package["url"]) if run_ledger else None
+        print(f"  {package['name']} (priority {package['priority']}): {describe_ledger_entry(ledger_entry, settings.upstream_probe)} ({package['url']})")
+
+# Method to run a build script command and return the process exit status
+def main(argv=None, default_publishers=("codeartifact",), prog=None):
+    from scan_pipeline.manifest import read_package_requests
+    from scan_pipeline.pipeline import create_pipeline
+    from scan_pipeline.settings import PipelineSettings, parse_publishers
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv = ["publish"] + argv
+    arguments = build_parser(prog).parse_args(argv)
+    dry_run = arguments.command == "validate" or arguments.dry_run
+
+    try:
+        print("\nInitiating security scans for external package repositories")
+
+        # Settings are read from the environment only once a command runs
+        settings = PipelineSettings(default_publishers=default_publishers)
+        if arguments.publishers:
+            settings.publishers = parse_publishers(arguments.publishers)
+        if arguments.command == "scan":
+            settings.publishers = ()
+        settings.print_summary()
+
+        settings_problems = settings.validate()
+        packages, request_problems = read_package_requests(arguments.requests)
+        problems = settings_problems + request_problems
+        for problem in problems:
+            print(f"Validation problem: {problem}")
+
+        if dry_run:
+            if arguments.command != "validate":
+                print_package_plan(settings, packages)
+            print(f"\n{len(packages)} valid package requests read from {arguments.requests}, {len(problems)} problems found")
+            return 1 if problems else 0
+
+        # Invalid request rows are left out so they do not hold up the rest of a large batch
+        if settings_problems:
+            raise ValueError(f"{len(settings_problems)} settings problems found")
+        if request_problems:
+            print(f"Leaving out the package request rows with problems, {len(packages)} valid requests remain")
+        if not packages:
+            raise ValueError(f"No valid package requests in {arguments.requests}")
+
+        pipeline = create_pipeline(settings)
+        pipeline.run(packages)
+
+    except Exception as error:
+        print(f"Action Failed, reason: {error}")
+        if dry_run:
+            return 1
+
+    return 0
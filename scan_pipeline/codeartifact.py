@@ -0,0 +1,184 @@
+import hashlib
+import json
+import time
+from scan_pipeline.publishers import PackagePublisher
+from scan_pipeline.retry import error_code
+
+# Method to write a JSON document to disk as a package version asset and return its asset metadata
+def write_json_asset(file_name, data):
+    content = json.dumps(data, indent=2, default=str).encode("utf-8")
+
+    with open(file_name, "wb") as asset_file:
+        asset_file.write(content)
+
+    return {
+        "name": file_name,
+        "file_name": file_name,
+        "sha256": hashlib.sha256(content).hexdigest(),
+        "size": len(content),
+    }
+
+# Method to return the status of a package version and its assets by name, or None when the version does not exist
+def describe_package_version_assets(codeartifact_client, package_version_input):
+    try:
+        package_version = codeartifact_client.describe_package_version(**package_version_input)["packageVersion"]
+    except Exception as error:
+        if error_code(error) == "ResourceNotFoundException":
+            return None
+        raise
+
+    assets = {}
+    list_assets_input = dict(package_version_input)
+    while True:
+        list_assets_response = codeartifact_client.list_package_version_assets(**list_assets_input)
+        for asset in list_assets_response.get("assets", []):
+            assets[asset["name"]] = asset
+        if not list_assets_response.get("nextToken"):
+            return {"status": package_version["status"], "assets": assets}
+        list_assets_input["nextToken"] = list_assets_response["nextToken"]
+
+# Method to publish a single asset, streaming it from disk with its precomputed SHA256 hash; botocore retries transient errors
+def publish_package_asset(codeartifact_client, package_version_input, asset, unfinished):
+    try:
+        with open(asset["file_name"], "rb") as asset_content:
+            return codeartifact_client.publish_package_version(
+                **package_version_input,
+                assetName=asset["name"],
+                assetContent=asset_content,
+                assetSHA256=asset["sha256"],
+                unfinished=unfinished,
+            )
+    except Exception as error:
+        if error_code(error) != "ConflictException":
+            raise
+
+        # A retried request the service had already stored conflicts with itself, so an identical stored asset counts as published
+        version_state = describe_package_version_assets(codeartifact_client, package_version_input)
+        stored_asset = version_state["assets"].get(asset["name"]) if version_state else None
+        if not stored_asset or stored_asset.get("hashes", {}).get("SHA-256") != asset["sha256"]:
+            raise
+
+        print(f"Asset '{asset['name']}' is already stored in version {package_version_input['packageVersion']}...")
+        return {
+            "format": package_version_input["format"],
+            "namespace": package_version_input["namespace"],
+            "package": package_version_input["package"],
+            "version": package_version_input["packageVersion"],
+            "versionRevision": None,
+            "status": version_state["status"],
+            "asset": stored_asset,
+        }
+
+# Method to publish several assets to one generic package version; the version stays unfinished until the last asset
+def publish_package_assets(codeartifact_client, domain, repository, namespace, package, package_version, assets):
+    package_version_input = {
+        "domain": domain,
+        "repository": repository,
+        "format": "generic",
+        "namespace": namespace,
+        "package": package,
+        "packageVersion": package_version,
+    }
+
+    package_version_response = None
+    for index, asset in enumerate(assets):
+        unfinished = index < len(assets) - 1
+        package_version_response = publish_package_asset(codeartifact_client, package_version_input, asset, unfinished)
+
+    # The last response describes the published package version
+    return package_version_response
+
+# Method to format new AWS CodeArtifact private package version asset for SNS email readability
+def format_private_package_response(response):
+
+    parsed_response = {
+        "format": response.get("format"),
+        "namespace": response.get("namespace"),
+        "package": response.get("package"),
+        "version": response.get("version"),
+        "versionRevision": response.get("versionRevision"),
+        "status": response.get("status"),
+        "asset": {
+            "name": response["asset"]["name"],
+            "size": response["asset"]["size"],
+            "hashes": response["asset"]["hashes"]
+        }
+    }
+    return parsed_response
+
+# Publishes approved packages as generic package versions in the private AWS CodeArtifact repository
+class CodeArtifactPublisher(PackagePublisher):
+
+    name = "codeartifact"
+
+    def __init__(self, settings, codeartifact_client, notifier, scan_result_cache=None):
+        self.settings = settings
+        self.codeartifact_client = codeartifact_client
+        self.notifier = notifier
+        self.scan_result_cache = scan_result_cache
+
+    # Method to check whether a package version is already published with its source archive; a conflict on any other version state
+    # (such as an unfinished version left by an earlier failed publish) is not treated as published
+    def is_version_published(self, package_name, package_version):
+        try:
+            version_state = describe_package_version_assets(self.codeartifact_client, {
+                "domain": self.settings.codeartifact_domain,
+                "repository": self.settings.codeartifact_repo,
+                "format": "generic",
+                "namespace": package_name,
+                "package": package_name,
+                "packageVersion": package_version,
+            })
+        except Exception as error:
+            print(f"[{package_name}] Failed to describe CodeArtifact version {package_version}: {error}")
+            return False
+        return bool(version_state) and version_state["status"] == "Published" and f"{package_name}.zip" in version_state["assets"]
+
+    def publish(self, package_name, download, findings, metrics):
+        print(f"[{package_name}] Creating new CodeArtifact package version asset...")
+
+        # Publish the package version with CodeArtifact, streaming each asset from disk with its precomputed SHA256 hash
+        pinned_version = None
+        try:
+            assets = []
+            if self.settings.publish_findings_asset:
+                assets.append(write_json_asset(f"{package_name}-findings.json", findings))
+            # The source archive is published last so the final response describes it
+            assets.append({"name": f"{package_name}.zip", **download})
+
+            # Use the requested version or the resolved upstream commit as the version, or the current timestamp when neither is known
+            pinned_version = download.get("version") or download.get("upstream_commit_sha")
+            package_version = pinned_version or str(int(time.time()))
+
+            with metrics.stage("publish", api_calls=len(assets), bytes_moved=sum(asset["size"] for asset in assets)):
+                package_version_response = publish_package_assets(
+                    self.codeartifact_client,
+                    self.settings.codeartifact_domain,
+                    self.settings.codeartifact_repo,
+                    namespace=package_name,
+                    package=package_name,
+                    package_version=package_version,
+                    assets=assets,
+                )
+        except Exception as error:
+            if pinned_version and error_code(error) == "ConflictException" and self.is_version_published(package_name, package_version):
+                # The pinned version was published before with its source archive, so the existing version is kept
+                print(f"[{package_name}] CodeArtifact version {package_version} already exists...")
+                approval = {
+                    "subject": f"{package_name} Package Approved",
+                    "message": f"AWS CodeArtifact private package version {package_version} of {package_name} was already published and is kept.",
+                }
+                return f"CodeArtifact version {package_version} already published", approval
+            raise Exception(f"Failed to publish package version: {error}")
+
+        if self.scan_result_cache:
+            self.scan_result_cache.set_published_version(download["sha256"], package_version_response.get("version"))
+
+        # The pipeline records the approval with the published version, so the requestor is still notified if this run fails to send it
+        formatted_message = format_private_package_response(package_version_response)
+        approval = {
+            "subject": f"{package_name} Package Approved",
+            "message": f"AWS CodeArtifact private package details: {package_name}\n\n{formatted_message}",
+        }
+        print(f"[{package_name}] New private package version asset created successfully...")
+        return f"published CodeArtifact version {package_version_response.get('version')}", approval
@@ -0,0 +1,48 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Raised by a package processing function to report the package as skipped rather than failed
+class PackageSkipped(Exception):
+    pass
+
+# Method to run the package processing stages for many packages at once with a bounded worker pool
+def process_packages_concurrently(packages, process_package, max_concurrency=4):
+    results = []
+    durations = {}
+
+    # Time each package from the moment a worker picks it up
+    def run_package(package):
+        start = time.perf_counter()
+        try:
+            return process_package(package)
+        finally:
+            durations[package["name"]] = time.perf_counter() - start
+
+    # Packages start in list order, so callers order the list by priority
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        futures = {executor.submit(run_package, package): package for package in packages}
+
+        # Collect each package outcome as soon as it finishes; a failure only affects its own package
+        for future in as_completed(futures):
+            package_name = futures[future]["name"]
+            try:
+                results.append({"package": package_name, "status": "Succeeded", "outcome": future.result()})
+            except PackageSkipped as skipped:
+                print(f"[{package_name}] Package skipped: {skipped}")
+                results.append({"package": package_name, "status": "Skipped", "outcome": str(skipped)})
+            except Exception as error:
+                print(f"[{package_name}] Package processing failed: {error}")
+                results.append({"package": package_name, "status": "Failed", "outcome": str(error)})
+            results[-1]["duration_seconds"] = durations.get(package_name, 0)
+
+    return results
+
+# Method to print per package results at the end of a run
+def print_results_summary(results):
+    print("\nExternal package repository results:")
+
+    for result in sorted(results, key=lambda result: result["package"]):
+        print(f"  - {result['package']}: {result['status']} ({result['outcome']})")
+
+    failed = sum(1 for result in results if result["status"] == "Failed")
+    print(f"\n{len(results) - failed} of {len(results)} packages processed successfully")
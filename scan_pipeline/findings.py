@@ -0,0 +1,56 @@
+# Finding severities that block publishing unless overridden with the BlockingSeverities environment variable
+DEFAULT_BLOCKING_SEVERITIES = ("Critical", "High", "Medium")
+
+# Method to iterate over every open finding of a scan, following nextToken across get_findings pages
+def iter_findings(codeguru_security_client, scan_name, page_size=1000, on_page=None):
+    get_findings_input = {
+        "scanName": scan_name,
+        "maxResults": page_size,
+        "status": "Open",
+    }
+
+    while True:
+        get_findings_response = codeguru_security_client.get_findings(**get_findings_input)
+        if on_page:
+            on_page(get_findings_response)
+
+        for finding in get_findings_response.get("findings", []):
+            yield finding
+
+        next_token = get_findings_response.get("nextToken")
+        if not next_token:
+            return
+        get_findings_input["nextToken"] = next_token
+
+# Finding severities reported by CodeGuru Security
+SEVERITIES = ("Critical", "High", "Medium", "Low", "Info")
+
+# Method to parse a comma-separated severity list such as "Critical,High,Medium" in any letter case
+def parse_severities(value):
+    if value is None:
+        return DEFAULT_BLOCKING_SEVERITIES
+
+    severity_names = {severity.lower(): severity for severity in SEVERITIES}
+    values = [severity.strip() for severity in value.split(",") if severity.strip()]
+    unknown_severities = [severity for severity in values if severity.lower() not in severity_names]
+    if unknown_severities:
+        raise ValueError(f"Unknown finding severities {', '.join(unknown_severities)}; expected any of {', '.join(SEVERITIES)}")
+    if not values:
+        raise ValueError(f"No blocking severities given; expected any of {', '.join(SEVERITIES)}")
+
+    return tuple(dict.fromkeys(severity_names[severity.lower()] for severity in values))
+
+# Method to stream findings through the severity gate; with early_exit, paging stops at the first blocking finding and the findings are reported as incomplete
+def evaluate_findings(findings, blocking_severities=DEFAULT_BLOCKING_SEVERITIES, early_exit=False):
+    collected_findings = []
+    has_blocking_severity = False
+
+    for finding in findings:
+        collected_findings.append(finding)
+
+        if finding["severity"] in blocking_severities:
+            has_blocking_severity = True
+            if early_exit:
+                return has_blocking_severity, collected_findings, False
+
+    return has_blocking_severity, collected_findings, True
@@ -0,0 +1,188 @@
+import threading
+import time
+from scan_pipeline.archive import read_file_base64
+from scan_pipeline.publishers import PackagePublisher
+
+# Publishes approved packages through the GitHub Git Data API, landing every package staged for a branch in one commit
+class GitDataPublisher:
+
+    def __init__(self, github, repo_full_name):
+        self.github = github
+        self.repo_full_name = repo_full_name
+        self.lock = threading.Lock()
+        self.repo = None
+        self.staged_files = {}
+
+    # Method to return the private package repository, looking it up only once per run
+    def get_repo(self):
+        with self.lock:
+            if self.repo is None:
+                self.repo = self.github.get_repo(self.repo_full_name)
+            return self.repo
+
+    # Method to upload an archive as a git blob, base64-encoding it exactly once, and stage it for the branch commit
+    def stage_file(self, package_name, branch_name, file_path, file_name, size, **details):
+        repo = self.get_repo()
+        blob = repo.create_git_blob(read_file_base64(file_name), "base64")
+
+        with self.lock:
+            self.staged_files.setdefault(branch_name, []).append({
+                "package": package_name,
+                "branch": branch_name,
+                "file_path": file_path,
+                "blob_sha": blob.sha,
+                "size": size,
+                **details,
+            })
+        print(f"[{package_name}] File '{file_path}' staged for branch '{branch_name}'...")
+
+    # Method to create one commit per branch holding every staged file and return the result for each package
+    def commit_staged_files(self):
+        with self.lock:
+            staged_files, self.staged_files = self.staged_files, {}
+        if not staged_files:
+            return []
+
+        repo = self.get_repo()
+
+        pushed_packages = []
+        for branch_name, files in staged_files.items():
+            file_names = ", ".join(file["file_path"].split("/")[-1] for file in files)
+            commit_message = f"Add private package - {file_names}" if len(files) == 1 else f"Add private packages - {file_names}"
+            package_details = []
+            for file in files:
+                details = [f"version {file['version']}"] if file.get("version") else []
+                if file.get("upstream_commit_sha"):
+                    details.append(f"upstream commit {file['upstream_commit_sha']}")
+                if details:
+                    package_details.append(f"{file['file_path'].split('/')[-1]}: {', '.join(details)}")
+            if package_details:
+                commit_message += "\n\n" + "\n".join(package_details)
+
+            try:
+                commit_sha = self._commit_files(repo, branch_name, files, commit_message)
+                print(f"Committed {len(files)} package file(s) to branch '{branch_name}' ({commit_sha})...")
+                error = None
+            except Exception as commit_error:
+                print(f"Failed to commit packages to branch '{branch_name}': {commit_error}")
+                commit_sha = None
+                error = commit_error
+
+            for file in files:
+                pushed_packages.append({
+                    **file,
+                    "commit_message": commit_message,
+                    "commit_sha": commit_sha,
+                    "file_download_url": f"https://github.com/{repo.full_name}/blob/{branch_name}/{file['file_path']}",
+                    "error": error,
+                })
+
+        return pushed_packages
+
+    # Method to write the staged blobs into a tree on top of the branch head and move the branch to the new commit
+    def _commit_files(self, repo, branch_name, files, commit_message):
+        try:
+            branch_ref = repo.get_git_ref(f"heads/{branch_name}")
+            parent_sha = branch_ref.object.sha
+        except Exception:
+            # Start new branches from the default branch if it exists, otherwise use 'main'
+            print(f"Creating new branch: '{branch_name}'...")
+            branch_ref = None
+            parent_sha = repo.get_branch(repo.default_branch or "main").commit.sha
+
+        from github import InputGitTreeElement
+
+        parent_commit = repo.get_git_commit(parent_sha)
+        tree_elements = [InputGitTreeElement(file["file_path"], "100644", "blob", sha=file["blob_sha"]) for file in files]
+        tree = repo.create_git_tree(tree_elements, base_tree=parent_commit.tree)
+        commit = repo.create_git_commit(commit_message, tree, [parent_commit])
+
+        if branch_ref:
+            branch_ref.edit(commit.sha)
+        else:
+            repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=commit.sha)
+
+        return commit.sha
+
+# Method to format the notification for an approved package pushed to the private GitHub package repository
+def format_package_pushed(pushed_package):
+    return f"""New GitHub private package '{pushed_package['package']}' pushed to branch '{pushed_package['branch']}.' \
+    Commit message: {pushed_package['commit_message']} \
+    Commit: {pushed_package['commit_sha']} \
+    Uploaded file: {pushed_package['file_path']} \
+    Size: {pushed_package['size']} bytes \
+    Download URL: {pushed_package['file_download_url']}"""
+
+# Publishes approved packages to the private GitHub package repository, staging blobs while packages are processed and committing at the end of the run
+class GitHubPublisher(PackagePublisher):
+
+    name = "github"
+    deferred = True
+
+    def __init__(self, settings, github, notifier, scan_result_cache=None):
+        self.settings = settings
+        self.notifier = notifier
+        self.scan_result_cache = scan_result_cache
+        # Share one Git Data API publisher so the repository is looked up once and packages are committed together
+        self.git_data_publisher = GitDataPublisher(github, f"{settings.github_owner}/{settings.github_repo}")
+
+    def publish(self, package_name, download, findings, metrics):
+        print(f"[{package_name}] Pushing to private GitHub package repository...")
+
+        # Specify the branch name and file path; the file is committed with the other approved packages at the end of the run
+        branch_name = self.settings.github_package_branch or package_name
+        file_path = f"packages/{package_name}.zip"
+
+        try:
+            with metrics.stage("publish", api_calls=1, bytes_moved=download["size"]):
+                self.git_data_publisher.stage_file(
+                    package_name,
+                    branch_name,
+                    file_path,
+                    download["file_name"],
+                    download["size"],
+                    sha256=download["sha256"],
+                    upstream_commit_sha=download.get("upstream_commit_sha"),
+                    version=download.get("version"),
+                    requestors=download.get("requestors"),
+                )
+        except Exception as error:
+            raise Exception(f"GitHub repository error: {error}")
+
+        # The requestor is notified once the commit lands in finish()
+        return self._staged_outcome(branch_name), None
+
+    def finish(self, results_by_package, package_metrics):
+        # Land every approved package in one commit per branch; the pipeline records each pushed package and notifies its requestors
+        published_packages = {}
+        commit_start = time.perf_counter()
+        pushed_packages = self.git_data_publisher.commit_staged_files()
+        commit_seconds = time.perf_counter() - commit_start
+
+        for pushed_package in pushed_packages:
+            result = results_by_package[pushed_package["package"]]
+            metrics = package_metrics[pushed_package["package"]]
+            staged_outcome = self._staged_outcome(pushed_package["branch"])
+            # The shared commit is attributed to every package it contains
+            metrics.record("git_commit", commit_seconds)
+
+            if pushed_package["error"]:
+                result["status"] = "Failed"
+                result["outcome"] = result["outcome"].replace(staged_outcome, f"GitHub repository error: {pushed_package['error']}")
+                continue
+
+            if self.scan_result_cache:
+                self.scan_result_cache.set_published_version(pushed_package["sha256"], pushed_package["commit_sha"])
+
+            pushed_outcome = f"pushed to GitHub branch '{pushed_package['branch']}' in commit {pushed_package['commit_sha']}"
+            result["outcome"] = result["outcome"].replace(staged_outcome, pushed_outcome)
+            published_packages[pushed_package["package"]] = {
+                "outcome": pushed_outcome,
+                "approval": {"subject": f"{pushed_package['package']} Package Approved", "message": format_package_pushed(pushed_package)},
+            }
+
+        return published_packages
+
+    # Method to describe a package staged for a branch but not yet committed
+    def _staged_outcome(self, branch_name):
+        return f"staged for GitHub branch '{branch_name}'"
@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from scan_pipeline.sqlite_store import SqliteStore
+
+# Stage recorded once a package has been fully handled; later runs skip completed rows while the archive is unchanged
+COMPLETED_STAGE = "completed"
+
+# Interface for run ledger backends keyed by package name and URL, recording the archive hash and the stages each package completed
+class RunLedger:
+
+    # Method to return the ledger entry of a package request, or None if the request was never seen
+    def get(self, package_name, package_url):
+        raise NotImplementedError
+
+    # Method to record a completed stage with its details; a new archive hash discards the stages recorded for the previous archive
+    def record_stage(self, package_name, package_url, stage_name, sha256=None, **details):
+        raise NotImplementedError
+
+    # Method to persist the ledger to its durable location
+    def sync(self):
+        pass
+
+# Local SQLite run ledger holding one row per package request, with the stages it completed as a JSON document
+class SqliteRunLedger(SqliteStore, RunLedger):
+
+    def __init__(self, path):
+        super().__init__(
+            path,
+            """CREATE TABLE IF NOT EXISTS package_runs (
+                package_name TEXT NOT NULL,
+                package_url TEXT NOT NULL,
+                sha256 TEXT,
+                stages TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (package_name, package_url)
+            )""",
+        )
+
+    def get(self, package_name, package_url):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT sha256, stages, updated_at FROM package_runs WHERE package_name = ? AND package_url = ?",
+                (package_name, package_url),
+            ).fetchone()
+
+        if not row:
+            return None
+
+        sha256, stages, updated_at = row
+        return {
+            "package_name": package_name,
+            "package_url": package_url,
+            "sha256": sha256,
+            "stages": json.loads(stages),
+            "updated_at": updated_at,
+        }
+
+    def record_stage(self, package_name, package_url, stage_name, sha256=None, **details):
+        now = time.time()
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT sha256, stages FROM package_runs WHERE package_name = ? AND package_url = ?",
+                (package_name, package_url),
+            ).fetchone()
+
+            stages = json.loads(row[1]) if row else {}
+            if row and sha256 and row[0] and sha256 != row[0]:
+                # The URL now serves a different archive, so the earlier stages no longer apply
+                stages = {}
+            sha256 = sha256 or (row[0] if row else None)
+            stages[stage_name] = {"completed_at": now, **details}
+
+            # The scanned stage holds the scan findings, whose datetime values are written to the stages document as strings
+            self.connection.execute(
+                """INSERT OR REPLACE INTO package_runs (package_name, package_url, sha256, stages, updated_at)
+                VALUES (?, ?, ?, ?, ?)""",
+                (package_name, package_url, sha256, json.dumps(stages, default=str), now),
+            )
+            self.connection.commit()
+
+# SQLite run ledger mirrored to Amazon S3 so a later CodeBuild build can resume where an earlier one stopped
+class S3RunLedger(SqliteRunLedger):
+
+    def __init__(self, path, s3_client, bucket, key, sync_interval_seconds=60):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.sync_interval_seconds = sync_interval_seconds
+        self.sync_lock = threading.Lock()
+        self.last_synced_at = 0
+
+        # Start from the ledger left by the previous build, if there is one
+        try:
+            s3_client.download_file(bucket, key, path)
+            print(f"Run ledger restored from s3://{bucket}/{key}")
+        except Exception as error:
+            print(f"Starting a new run ledger, s3://{bucket}/{key} could not be read: {error}")
+
+        super().__init__(path)
+
+    def record_stage(self, package_name, package_url, stage_name, sha256=None, **details):
+        super().record_stage(package_name, package_url, stage_name, sha256, **details)
+
+        # Upload completed packages at most once per interval so a crashed build loses little progress
+        if stage_name == COMPLETED_STAGE and time.monotonic() - self.last_synced_at >= self.sync_interval_seconds:
+            self.sync()
+
+    def sync(self):
+        with self.sync_lock, self.lock:
+            self.connection.commit()
+            self.s3_client.upload_file(self.path, self.bucket, self.key)
+            self.last_synced_at = time.monotonic()
+        print(f"Run ledger uploaded to s3://{self.bucket}/{self.key}")
+
+# Method to return the details recorded for a completed stage of a ledger entry, or None
+def completed_stage(ledger_entry, stage_name):
+    if not ledger_entry:
+        return None
+
+    return ledger_entry["stages"].get(stage_name)
+
+# Method to create the run ledger from environment configuration; an empty path disables the ledger
+def create_run_ledger(path, s3_uri=None, s3_client=None, sync_interval_seconds=60):
+    if not path:
+        return None
+
+    if s3_uri:
+        if not s3_uri.startswith("s3://") or "/" not in s3_uri[len("s3://"):]:
+            raise ValueError(f"Run ledger location {s3_uri} is not an s3://bucket/key URI")
+        bucket, _, key = s3_uri[len("s3://"):].partition("/")
+        return S3RunLedger(path, s3_client, bucket, key, sync_interval_seconds)
+
+    return SqliteRunLedger(path)
@@ -0,0 +1,180 @@
+import csv
+import json
+import re
+from scan_pipeline.settings import parse_scan_type
+
+# Default package request file in the private internal repository
+DEFAULT_REQUESTS_FILE = "external-package-request.csv"
+
+# File extensions read as JSON lines, one request object per line; any other file is read as CSV
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+
+# Field names accepted in a CSV header row or a JSON lines object, mapped to the request field they set
+FIELD_ALIASES = {
+    "name": "name",
+    "package": "name",
+    "package_name": "name",
+    "url": "url",
+    "zip_url": "url",
+    "package_url": "url",
+    "version": "version",
+    "priority": "priority",
+    "scan_type": "scan_type",
+    "requestor": "requestor",
+    "requestor_email": "requestor",
+    "email": "requestor",
+}
+
+# Request fields of a CSV file without a header row, in column order; only the name and URL are required
+CSV_COLUMNS = ("name", "url", "version", "priority", "scan_type", "requestor")
+
+# Versions that are valid CodeArtifact generic package versions
+VERSION_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._+-]{0,254}$")
+
+# Requestor email addresses
+EMAIL_PATTERN = re.compile(r"^[^@\s,;]+@[^@\s,;]+\.[^@\s,;]+$")
+
+# Method to adjust package name, keeping only ASCII letters, digits, and - _ $ : .
+def sanitize_package_name(name):
+    return re.sub(r'[^a-zA-Z0-9_$:.-]', '', name)
+
+# Method to check whether a CSV row is a header row naming at least the name and URL fields
+def is_header_row(row):
+    fields = [FIELD_ALIASES.get(cell.strip().lower()) for cell in row]
+    return "name" in fields and "url" in fields
+
+# Method to stream the rows of a CSV or JSON lines request file as (line number, fields, problem) without loading the whole file
+def iter_manifest_rows(file_name):
+    if file_name.lower().endswith(JSON_LINES_EXTENSIONS):
+        with open(file_name) as manifest:
+            for line_number, line in enumerate(manifest, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    fields = json.loads(line)
+                except ValueError as error:
+                    yield line_number, None, f"is not valid JSON: {error}"
+                    continue
+                if not isinstance(fields, dict):
+                    yield line_number, None, "is not a JSON object"
+                    continue
+                yield line_number, fields, None
+        return
+
+    with open(file_name, newline="") as manifest:
+        reader = csv.reader(manifest)
+        columns = None
+
+        for row in reader:
+            # Blank rows and # comments are allowed between requests
+            if not any(cell.strip() for cell in row) or row[0].lstrip().startswith("#"):
+                continue
+            if columns is None and is_header_row(row):
+                columns = [cell.strip().lower() for cell in row]
+                unknown_columns = [column for column in columns if column not in FIELD_ALIASES]
+                if unknown_columns:
+                    # A misspelled column would silently drop a field from every row, so the file is not read any further
+                    yield reader.line_num, None, f"has unknown columns {', '.join(unknown_columns)}; expected any of {', '.join(FIELD_ALIASES)}"
+                    return
+                continue
+
+            row_columns = columns or CSV_COLUMNS
+            if len(row) > len(row_columns):
+                yield reader.line_num, None, f"has {len(row)} columns, expected at most {len(row_columns)}"
+                continue
+            yield reader.line_num, dict(zip(row_columns, row)), None
+
+# Method to validate the fields of one request row, returning the request and the problems that leave it out
+def parse_package_request(fields):
+    request = {"name": None, "url": None, "version": None, "priority": 0, "scan_type": None, "requestor": None}
+    problems = []
+
+    for key, value in fields.items():
+        field = FIELD_ALIASES.get(str(key).strip().lower())
+        if not field:
+            problems.append(f"unknown field {key}")
+            continue
+        if value is None or str(value).strip() == "":
+            continue
+
+        if field == "priority":
+            try:
+                request["priority"] = int(str(value).strip())
+            except ValueError:
+                problems.append(f"priority {value} is not a whole number")
+        elif not isinstance(value, str):
+            problems.append(f"{key} {value} is not a string")
+        else:
+            request[field] = value.strip()
+
+    if not request["name"]:
+        problems.append("has no package name")
+    elif not sanitize_package_name(request["name"]):
+        problems.append(f"package name {request['name']} has no ASCII letters or digits")
+    else:
+        request["name"] = sanitize_package_name(request["name"])
+
+    if not request["url"]:
+        problems.append("has no zip URL")
+    elif not request["url"].lower().startswith(("https://", "http://")):
+        problems.append(f"URL {request['url']} is not an HTTP or HTTPS URL")
+
+    if request["version"] and not VERSION_PATTERN.match(request["version"]):
+        problems.append(f"version {request['version']} is not a valid package version")
+    if request["requestor"] and not EMAIL_PATTERN.match(request["requestor"]):
+        problems.append(f"requestor {request['requestor']} is not an email address")
+    # Requests merged for the same URL notify every requestor
+    requestor = request.pop("requestor")
+    request["requestors"] = [requestor] if requestor else []
+    if request["scan_type"]:
+        try:
+            request["scan_type"] = parse_scan_type(request["scan_type"])
+        except ValueError as error:
+            problems.append(str(error))
+
+    return request, problems
+
+# Method to read, validate, and dedupe a request file, returning the valid requests in file order and the problems of the rows left out
+def read_package_requests(file_name=DEFAULT_REQUESTS_FILE):
+    requests_by_url = {}
+    lines_by_name = {}
+    problems = []
+
+    for line_number, fields, problem in iter_manifest_rows(file_name):
+        if problem:
+            problems.append(f"{file_name} line {line_number} {problem}")
+            continue
+
+        request, row_problems = parse_package_request(fields)
+        if row_problems:
+            problems.extend(f"{file_name} line {line_number}: {row_problem}" for row_problem in row_problems)
+            continue
+        request["line"] = line_number
+
+        # Identical URLs are downloaded and scanned once, at the highest priority they were requested with, notifying every requestor
+        duplicate = requests_by_url.get(request["url"])
+        if duplicate:
+            conflicts = [field for field in ("version", "scan_type") if duplicate[field] and request[field] and duplicate[field] != request[field]]
+            if conflicts:
+                problems.extend(
+                    f"{file_name} line {line_number}: {field} {request[field]} conflicts with {field} {duplicate[field]} requested for {request['url']} on line {duplicate['line']}"
+                    for field in conflicts
+                )
+                continue
+
+            for field in ("version", "scan_type"):
+                duplicate[field] = duplicate[field] or request[field]
+            duplicate["priority"] = max(duplicate["priority"], request["priority"])
+            duplicate["requestors"].extend(requestor for requestor in request["requestors"] if requestor not in duplicate["requestors"])
+            print(f"{file_name} line {line_number}: {request['url']} is already requested on line {duplicate['line']}, merging the requests")
+            continue
+
+        # Packages are downloaded to <package name>.zip and published under their name, so names must be unique
+        if request["name"] in lines_by_name:
+            problems.append(f"{file_name} line {line_number}: package name {request['name']} is already used on line {lines_by_name[request['name']]} for a different URL")
+            continue
+
+        lines_by_name[request["name"]] = line_number
+        requests_by_url[request["url"]] = request
+
+    return list(requests_by_url.values()), problems
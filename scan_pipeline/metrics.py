@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Records per-stage durations, bytes moved, and API call counts for one external package
+class PackageMetrics:
+
+    def __init__(self, package_name):
+        self.package_name = package_name
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    # Method to add a measurement to a stage; repeated measurements of the same stage are summed
+    def record(self, stage_name, duration_seconds=0, api_calls=0, bytes_moved=0):
+        with self.lock:
+            stage = self.stages.setdefault(stage_name, {"duration_seconds": 0, "api_calls": 0, "bytes": 0})
+            stage["duration_seconds"] += duration_seconds
+            stage["api_calls"] += api_calls
+            stage["bytes"] += bytes_moved
+
+    # Method to time a block of code as a pipeline stage
+    @contextmanager
+    def stage(self, stage_name, api_calls=0, bytes_moved=0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage_name, time.perf_counter() - start, api_calls, bytes_moved)
+
+    # Method to build a CloudWatch embedded metric format (EMF) record for the package
+    def to_emf_record(self, namespace, pipeline, result):
+        record = {
+            "Pipeline": pipeline,
+            "Package": self.package_name,
+            "Status": result["status"],
+            "Outcome": result["outcome"],
+        }
+        metric_definitions = []
+
+        def add_metric(name, value, unit):
+            record[name] = value
+            metric_definitions.append({"Name": name, "Unit": unit})
+
+        add_metric("TotalDuration", round(result.get("duration_seconds", 0) * 1000, 1), "Milliseconds")
+        for stage_name, stage in self.stages.items():
+            prefix = "".join(word.capitalize() for word in stage_name.split("_"))
+            add_metric(f"{prefix}Duration", round(stage["duration_seconds"] * 1000, 1), "Milliseconds")
+            if stage["bytes"]:
+                add_metric(f"{prefix}Bytes", stage["bytes"], "Bytes")
+            if stage["api_calls"]:
+                add_metric(f"{prefix}ApiCalls", stage["api_calls"], "Count")
+
+        record["_aws"] = {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": namespace,
+                "Dimensions": [["Pipeline"]],
+                "Metrics": metric_definitions,
+            }],
+        }
+        return record
+
+# Method to print one EMF JSON line per package and append the same records to a JSON lines file
+def write_metrics_records(package_metrics, results, namespace, pipeline, metrics_file=None):
+    records = [
+        package_metrics[result["package"]].to_emf_record(namespace, pipeline, result)
+        for result in sorted(results, key=lambda result: result["package"])
+        if result["package"] in package_metrics
+    ]
+
+    for record in records:
+        print(json.dumps(record, default=str))
+
+    if metrics_file:
+        with open(metrics_file, "a") as file:
+            for record in records:
+                file.write(json.dumps(record, default=str) + "\n")
+
+# Method to print an end-of-run table with each package's stage durations, bytes moved, and API calls
+def print_metrics_summary(package_metrics, results):
+    stage_names = []
+    for metrics in package_metrics.values():
+        for stage_name in metrics.stages:
+            if stage_name not in stage_names:
+                stage_names.append(stage_name)
+
+    headers = ["package", "status"] + stage_names + ["total_s", "bytes", "api_calls"]
+    rows = []
+    for result in sorted(results, key=lambda result: result["package"]):
+        metrics = package_metrics.get(result["package"])
+        stages = metrics.stages if metrics else {}
+        rows.append(
+            [result["package"], result["status"]]
+            + [f"{stages[stage_name]['duration_seconds']:.1f}" if stage_name in stages else "-" for stage_name in stage_names]
+            + [
+                f"{result.get('duration_seconds', 0):.1f}",
+                str(sum(stage["bytes"] for stage in stages.values())),
+                str(sum(stage["api_calls"] for stage in stages.values())),
+            ]
+        )
+
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    print("\nPipeline stage metrics (seconds):")
+    for row in [headers] + rows:
+        print("  " + "  ".join(str(value).ljust(width) for value, width in zip(row, widths)))
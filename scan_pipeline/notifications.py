@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Largest SNS message in bytes, less headroom for the message envelope
+MAX_SNS_MESSAGE_BYTES = 256 * 1024 - 2048
+
+# Largest SNS email subject in characters
+MAX_SNS_SUBJECT_LENGTH = 100
+
+# How notifications are grouped: one message per package, one digest per run, or one digest per requestor
+NOTIFICATION_MODES = ("package", "run", "requestor")
+
+# Method to format a single finding for SNS email readability, listing the packages it was found in when known
+def format_finding(index, finding, package_names=None):
+    reference_urls = finding.get('referenceUrls', [])
+    formatted_reference_urls = ', '.join(reference_urls) if reference_urls else 'No reference URLs available'
+
+    lines = [
+        f"\n{index}. Vulnerability: {finding['title']}\n",
+        f"   - Description: {finding['description']}\n",
+        f"   - Severity: {finding['severity']}\n",
+        f"   - Recommendation: {finding['remediation']['recommendation']['text']}\n",
+        f"   - Path: {finding['vulnerability']['filePath']['path']}\n",
+    ]
+    if package_names:
+        lines.append(f"   - Packages: {', '.join(package_names)}\n")
+    lines.append(f"   - Reference URLs: {formatted_reference_urls}\n\n")
+
+    return "".join(lines)
+
+# Method to format findings for SNS email readability
+def format_findings(findings):
+    return "".join(format_finding(index, finding) for index, finding in enumerate(findings, start=1))
+
+# Method to build the key under which identical findings from different packages are merged
+def finding_key(finding):
+    # Archives unpack into a top-level folder named after the repository and ref, which is dropped so vendored copies match
+    path = finding['vulnerability']['filePath']['path'].split("/", 1)[-1]
+    return (finding.get('detectorId'), finding['title'], finding['severity'], path)
+
+# Method to merge identical findings across packages, keeping the first occurrence and the packages it was found in
+def dedupe_findings(findings_by_package):
+    merged_findings = {}
+
+    for package_name, findings in findings_by_package:
+        for finding in findings:
+            merged = merged_findings.setdefault(finding_key(finding), {"finding": finding, "packages": []})
+            if package_name not in merged["packages"]:
+                merged["packages"].append(package_name)
+
+    return list(merged_findings.values())
+
+# Collects package approvals and rejections and sends them to the requestors, one per package or batched into digests
+class NotificationAggregator:
+
+    def __init__(self, sns_client, sns_topic_arn, mode="run", max_concurrency=4, max_message_bytes=MAX_SNS_MESSAGE_BYTES, report_directory="notification-reports", s3_client=None, report_s3_uri=None):
+        if mode not in NOTIFICATION_MODES:
+            raise ValueError(f"Unknown notification mode {mode}; expected one of {', '.join(NOTIFICATION_MODES)}")
+
+        self.sns_client = sns_client
+        self.sns_topic_arn = sns_topic_arn
+        self.mode = mode
+        self.max_concurrency = max_concurrency
+        self.max_message_bytes = max_message_bytes
+        self.report_directory = report_directory
+        self.s3_client = s3_client
+        self.report_s3_uri = report_s3_uri.rstrip("/") if report_s3_uri else None
+        self.run_id = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        self.lock = threading.Lock()
+        self.notifications = []
+
+    # Whether notifications are held back until flush()
+    @property
+    def deferred(self):
+        return self.mode != "package"
+
+    # Method to notify the requestors that a package was approved; the message describes where it was published
+    def add_approved(self, package_name, subject, message, requestors=None, metrics=None):
+        self._add({"package": package_name, "verdict": "Approved", "subject": subject, "message": message, "requestors": list(requestors or [])}, metrics)
+
+    # Method to notify the requestors that a package was rejected, with its findings report
+    def add_rejected(self, package_name, findings, requestors=None, metrics=None):
+        self._add({
+            "package": package_name,
+            "verdict": "Rejected",
+            "subject": f"{package_name} Security Findings Report",
+            "message": f"Security findings report for external package repository: {package_name}\n\n{format_findings(findings)}",
+            "findings": findings,
+            "requestors": list(requestors or []),
+        }, metrics)
+
+    def _add(self, notification, metrics):
+        if self.deferred:
+            with self.lock:
+                self.notifications.append(notification)
+            return
+
+        # Package mode sends straight away from the package worker
+        if metrics:
+            with metrics.stage("sns", api_calls=1):
+                self._send(notification["subject"], notification["message"], notification["requestors"], notification["package"])
+        else:
+            self._send(notification["subject"], notification["message"], notification["requestors"], notification["package"])
+
+    # Method to send every held-back notification as digests, concurrently, and return the packages whose digests were sent and the error for each package whose digest failed
+    def flush(self):
+        with self.lock:
+            notifications, self.notifications = self.notifications, []
+        if not notifications:
+            return set(), {}
+
+        # In requestor mode a package requested by several requestors appears in each of their digests
+        groups = {}
+        for notification in notifications:
+            group_keys = (notification["requestors"] or [None]) if self.mode == "requestor" else [None]
+            for group_key in group_keys:
+                groups.setdefault(group_key, []).append(notification)
+
+        errors = {}
+        sent_digests = []
+
+        def send_digest(requestor, group):
+            subject, message = self.build_digest(group)
+            try:
+                self._send(subject, message, [requestor] if requestor else [], f"digest-{requestor or 'all'}")
+                sent_digests.append(requestor)
+            except Exception as error:
+                print(f"Failed to send notification digest{' to ' + requestor if requestor else ''}: {error}")
+                for notification in group:
+                    errors[notification["package"]] = error
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_concurrency, len(groups)))) as executor:
+            for future in [executor.submit(send_digest, requestor, group) for requestor, group in groups.items()]:
+                future.result()
+
+        sent_notifications = sum(len(groups[requestor]) for requestor in sent_digests)
+        total_notifications = sum(len(group) for group in groups.values())
+        print(f"Sent {len(sent_digests)} of {len(groups)} notification digest(s) holding {sent_notifications} of {total_notifications} package notification(s)")
+        sent_packages = {notification["package"] for notification in notifications} - set(errors)
+        return sent_packages, errors
+
+    # Method to build the subject and message of a digest, listing each distinct finding once across the rejected packages
+    def build_digest(self, notifications):
+        approved = [notification for notification in notifications if notification["verdict"] == "Approved"]
+        rejected = [notification for notification in notifications if notification["verdict"] == "Rejected"]
+        subject = f"External package security review: {len(approved)} approved, {len(rejected)} rejected"
+
+        parts = [f"External package security review results ({len(notifications)} packages)\n"]
+        if rejected:
+            parts.append(f"\nRejected ({len(rejected)}):\n")
+            parts.extend(f"  - {notification['package']}: {len(notification['findings'])} findings\n" for notification in rejected)
+        if approved:
+            parts.append(f"\nApproved ({len(approved)}):\n")
+            parts.extend(f"  - {notification['package']}\n" for notification in approved)
+
+        for notification in approved:
+            parts.append(f"\n{notification['subject']}\n{notification['message']}\n")
+
+        merged_findings = dedupe_findings((notification["package"], notification["findings"]) for notification in rejected)
+        if merged_findings:
+            finding_count = sum(len(notification["findings"]) for notification in rejected)
+            parts.append(f"\nSecurity findings ({len(merged_findings)} distinct of {finding_count}):\n")
+            parts.extend(format_finding(index, merged["finding"], merged["packages"]) for index, merged in enumerate(merged_findings, start=1))
+
+        return subject, "".join(parts)
+
+    # Method to publish a message to the SNS topic, spilling oversized messages to a report file and sending a truncated copy with a link
+    def _send(self, subject, message, requestors, report_name):
+        if len(message.encode("utf-8")) > self.max_message_bytes:
+            message = self._truncate(message, self._spill(report_name, message))
+
+        publish_input = {
+            "TopicArn": self.sns_topic_arn,
+            "Subject": subject[:MAX_SNS_SUBJECT_LENGTH],
+            "Message": message,
+        }
+        if requestors:
+            # Subscription filter policies on the requestor attribute route each message to its requestors; a filter policy matches
+            # a String.Array attribute when any of its values match
+            if len(requestors) == 1:
+                publish_input["MessageAttributes"] = {"requestor": {"DataType": "String", "StringValue": requestors[0]}}
+            else:
+                publish_input["MessageAttributes"] = {"requestor": {"DataType": "String.Array", "StringValue": json.dumps(requestors)}}
+
+        sns_response = self.sns_client.publish(**publish_input)
+        print(f"Notification '{publish_input['Subject']}' sent ({len(message.encode('utf-8'))} bytes).")
+        return sns_response
+
+    # Method to keep the start of an oversized message, cut at a line boundary, followed by a link to the full report
+    def _truncate(self, message, report_location):
+        footer = f"\n\n... Message truncated to fit the SNS size limit. Full report: {report_location}\n"
+        limit = self.max_message_bytes - len(footer.encode("utf-8"))
+
+        truncated = message.encode("utf-8")[:limit].decode("utf-8", errors="ignore")
+        return truncated[:truncated.rfind("\n") + 1 or len(truncated)] + footer
+
+    # Method to write the full report to the report directory and, when configured, to Amazon S3, returning where it can be read
+    def _spill(self, report_name, message):
+        os.makedirs(self.report_directory, exist_ok=True)
+        file_name = os.path.join(self.report_directory, f"{self.run_id}-{report_name}.txt")
+        with open(file_name, "w", encoding="utf-8") as report_file:
+            report_file.write(message)
+
+        if not self.report_s3_uri or not self.s3_client:
+            # The buildspec keeps the report directory in the DownloadedRepos output artifact, stored in the pipeline's artifact bucket
+            return f"{file_name} in the DownloadedRepos build output artifact"
+
+        bucket, _, prefix = self.report_s3_uri[len("s3://"):].partition("/")
+        key = "/".join(part for part in (prefix, os.path.basename(file_name)) if part)
+        self.s3_client.upload_file(file_name, bucket, key)
+        return f"s3://{bucket}/{key} (https://s3.console.aws.amazon.com/s3/object/{bucket}?prefix={key})"
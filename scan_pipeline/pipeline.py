@@ -0,0 +1,453 @@
+import os
+import time
+from scan_pipeline.archive import file_sha256
+from scan_pipeline.concurrency import PackageSkipped, process_packages_concurrently, print_results_summary
+from scan_pipeline.findings import evaluate_findings, iter_findings
+from scan_pipeline.ledger import COMPLETED_STAGE, completed_stage
+from scan_pipeline.metrics import PackageMetrics, print_metrics_summary, write_metrics_records
+from scan_pipeline.prefilter import build_scan_archive
+
+# Outcome of an approved package in a scan-only run; it stays open in the run ledger for a later publish run
+SCAN_ONLY_OUTCOME = "Approved, not published (scan only)"
+
+# Scans external packages once and hands every approved package to each configured publisher
+class ScanPipeline:
+
+    def __init__(self, settings, codeguru_security_client, notifier, http_transport, scan_result_cache, scan_poller, publishers, run_ledger=None, upstream_probe=None, pre_scanner=None):
+        self.settings = settings
+        self.codeguru_security_client = codeguru_security_client
+        self.notifier = notifier
+        self.http_transport = http_transport
+        self.scan_result_cache = scan_result_cache
+        self.scan_poller = scan_poller
+        self.publishers = publishers
+        self.run_ledger = run_ledger
+        self.upstream_probe = upstream_probe
+        self.pre_scanner = pre_scanner
+
+    # Name of the pipeline in the metrics records, such as "codeartifact" or "codeartifact+github"
+    @property
+    def name(self):
+        return "+".join(publisher.name for publisher in self.publishers) or "scan"
+
+    # Method to check whether the upstream archive changed since an earlier run without downloading it
+    def probe(self, package_name, package_url, ledger_entry, metrics):
+        if not self.upstream_probe:
+            return None
+
+        try:
+            with metrics.stage("probe", api_calls=1):
+                probe = self.upstream_probe.probe(package_url, completed_stage(ledger_entry, "probed"))
+        except Exception as error:
+            # Fall back to downloading the archive and comparing its hash with the earlier run
+            print(f"[{package_name}] Could not probe the upstream archive, downloading it to compare hashes: {error}")
+            return {"changed": True}
+
+        pinned = f" at commit {probe['commit_sha']}" if probe.get("commit_sha") else ""
+        print(f"[{package_name}] Upstream archive{pinned} {'changed or not seen before' if probe['changed'] else 'unchanged since an earlier run'}...")
+        return probe
+
+    # Method to download an external package repository archive, hashing it while it streams to disk
+    def download(self, package_name, package_url, metrics):
+        try:
+            zip_file_name = f"{package_name}.zip"
+            with metrics.stage("download"):
+                download = self.http_transport.download_file(package_url, zip_file_name)
+            metrics.record("download", bytes_moved=download["size"])
+            print(f"[{package_name}] Package downloaded successfully ({download['size']} bytes, {download['content_type']}, SHA256 {download['sha256']})...")
+            return download
+
+        except Exception as error:
+            raise Exception(f"Failed to download package: {error}")
+
+    # Method to reuse an archive downloaded by an earlier run when the file on disk still matches the hash in the run ledger
+    def resume_download(self, package_name, ledger_entry):
+        downloaded = completed_stage(ledger_entry, "downloaded")
+        if not downloaded or not os.path.exists(downloaded["file_name"]) or os.path.getsize(downloaded["file_name"]) != downloaded["size"]:
+            return None
+
+        sha256, size = file_sha256(downloaded["file_name"])
+        if sha256 != ledger_entry["sha256"]:
+            return None
+
+        print(f"[{package_name}] Reusing archive downloaded by an earlier run ({size} bytes, SHA256 {sha256})...")
+        return {"file_name": downloaded["file_name"], "sha256": sha256, "size": size, "content_type": downloaded.get("content_type")}
+
+    # Method to apply the fast local rules to the archive entries, so packages that fail them are rejected before any upload
+    def pre_scan(self, package_name, zip_file_name, metrics):
+        if not self.pre_scanner:
+            return None
+
+        with metrics.stage("pre_scan"):
+            pre_scan = self.pre_scanner.scan(zip_file_name)
+        metrics.record("pre_scan", bytes_moved=pre_scan["bytes_searched"])
+
+        if pre_scan["rejected"]:
+            print(f"[{package_name}] Pre-scan rejected the package with {len(pre_scan['findings'])} findings, skipping the CodeGuru Security scan...")
+        elif pre_scan["flags"]:
+            flag = pre_scan["flags"][0]
+            print(f"[{package_name}] Pre-scan flagged {len(pre_scan['flags'])} entries as higher risk, such as {flag['path']} ({flag['rule']})...")
+        else:
+            print(f"[{package_name}] Pre-scan passed, {pre_scan['entries_searched']} of {pre_scan['entries_total']} entries searched for secrets...")
+        return pre_scan
+
+    # Method to choose the CodeGuru Security scan type, from the request or ScanType; with auto, packages the pre-scan did not flag get the faster Express scan
+    def choose_scan_type(self, pre_scan, requested_scan_type=None):
+        scan_type = requested_scan_type or self.settings.scan_type
+        if scan_type != "auto":
+            return scan_type
+
+        return "Express" if pre_scan and not pre_scan["flags"] else "Standard"
+
+    # Method to check whether an earlier scan can stand in for the chosen scan type; a Standard scan covers an Express request, but an
+    # Express scan only covers another Express request
+    def covers_scan_type(self, earlier_scan_type, scan_type):
+        return earlier_scan_type == "Standard" or earlier_scan_type == scan_type
+
+    # Method to build the archive uploaded for scanning, falling back to the original archive when the filters leave nothing to scan
+    def prepare_scan_archive(self, package_name, zip_file_name, metrics):
+        if not self.settings.scan_archive_filter:
+            return zip_file_name
+
+        # Scan a slimmed copy without binaries and media; the original archive is still the one published
+        with metrics.stage("scan_archive"):
+            scan_archive = build_scan_archive(
+                zip_file_name,
+                os.path.join("scan-archives", os.path.basename(zip_file_name)),
+                include_patterns=self.settings.scan_include_patterns,
+                exclude_patterns=self.settings.scan_exclude_patterns,
+                max_entry_bytes=self.settings.scan_max_entry_bytes,
+            )
+        print(f"[{package_name}] Scan archive keeps {scan_archive['entries_kept']} of {scan_archive['entries_total']} entries ({scan_archive['bytes_saved']} bytes saved)...")
+
+        return scan_archive["file_name"] if scan_archive["entries_kept"] else zip_file_name
+
+    # Method to upload an external package repository archive to Amazon CodeGuru Security and start a scan, returning its run ID
+    def start_scan(self, package_name, zip_file_name, metrics, scan_type="Standard"):
+        try:
+            print(f"[{package_name}] Creating CodeGuru Security upload URL...")
+            create_url_input = {"scanName": package_name}
+            with metrics.stage("create_upload_url", api_calls=1):
+                create_url_response = self.codeguru_security_client.create_upload_url(**create_url_input)
+            url = create_url_response["s3Url"]
+            artifact_id = create_url_response["codeArtifactId"]
+
+            print(f"[{package_name}] Uploading external package repository file...")
+            with metrics.stage("s3_put", api_calls=1, bytes_moved=os.path.getsize(zip_file_name)):
+                upload_response = self.http_transport.upload_file(url, zip_file_name, headers=create_url_response["requestHeaders"])
+
+            if upload_response.status_code != 200:
+                raise Exception("Failed to upload external package repository file to Amazon CodeGuru Security.")
+
+            print(f"[{package_name}] Conducting CodeGuru Security {scan_type} scan...")
+            scan_input = {
+                "resourceId": {
+                    "codeArtifactId": artifact_id,
+                },
+                "scanName": package_name,
+                "scanType": scan_type,
+                "analysisType": "Security" # All
+            }
+            with metrics.stage("create_scan", api_calls=1):
+                create_scan_response = self.codeguru_security_client.create_scan(**scan_input)
+            return create_scan_response["runId"]
+
+        except Exception as error:
+            raise Exception(f"Issue performing Amazon CodeGuru Security scan: {error}")
+
+    # Method to wait for a CodeGuru Security scan to finish and return an iterator over its findings
+    def wait_for_scan(self, package_name, run_id, metrics):
+        try:
+            print(f"[{package_name}] Retrieving scan results...")
+            with metrics.stage("scan_wait"):
+                get_scan_response = self.scan_poller.wait(package_name, run_id)
+            metrics.record("scan_wait", api_calls=self.scan_poller.poll_counts[run_id])
+            print(f"[{package_name}] Scan {get_scan_response['scanState']} after {self.scan_poller.poll_counts[run_id]} status checks...")
+
+            if get_scan_response["scanState"] != "Successful":
+                raise Exception(f"CodeGuru Scan {package_name} failed")
+
+            print(f"[{package_name}] Analyzing security scan finding severities...")
+            # Findings are paged in lazily so the severity gate can stop paging early
+            return iter_findings(self.codeguru_security_client, package_name, on_page=lambda response: metrics.record("get_findings", api_calls=1))
+
+        except Exception as error:
+            raise Exception(f"Issue performing Amazon CodeGuru Security scan: {error}")
+
+    # Method to check finding severities against the blocking severities while paging through the findings, returning whether the findings are complete
+    def evaluate(self, findings, metrics):
+        # Findings already held in full, such as a reused scan result, are always evaluated in full
+        early_exit = self.settings.findings_early_exit and not isinstance(findings, list)
+        with metrics.stage("get_findings"):
+            return evaluate_findings(findings, self.settings.blocking_severities, early_exit=early_exit)
+
+    # Method to record a completed stage of a package in the run ledger, when one is configured
+    def record_stage(self, package_name, package_url, stage_name, sha256=None, **details):
+        if self.run_ledger:
+            self.run_ledger.record_stage(package_name, package_url, stage_name, sha256, **details)
+
+    # Method to download, scan, and publish or report a single external package repository, resuming after the last stage an earlier run completed
+    def process_package(self, package, metrics):
+        package_name, package_url = package["name"], package["url"]
+        print(f"\n[{package_name}] Processing package from {package_url}")
+        ledger_entry = self.run_ledger.get(package_name, package_url) if self.run_ledger else None
+        completed = completed_stage(ledger_entry, COMPLETED_STAGE)
+
+        # Skip requests completed by an earlier run when the probe shows the upstream archive is unchanged
+        probe = self.probe(package_name, package_url, ledger_entry, metrics)
+        probe_details = {key: value for key, value in (probe or {}).items() if key != "changed"}
+        if completed and probe and not probe["changed"]:
+            self.record_stage(package_name, package_url, "probed", **probe_details)
+            raise PackageSkipped(f"Upstream unchanged since an earlier run: {completed['outcome']}")
+
+        # Without a probe, a completed request is downloaded again and skipped only if its archive hash is unchanged; an archive
+        # downloaded by an earlier run is only reused by an unfinished request while the upstream is unchanged
+        download = None if completed or (probe and probe["changed"]) else self.resume_download(package_name, ledger_entry)
+        if not download:
+            download = self.download(package_name, probe_details.get("download_url") or package_url, metrics)
+            self.record_stage(package_name, package_url, "downloaded", download["sha256"], file_name=download["file_name"], size=download["size"], content_type=download["content_type"])
+
+            if ledger_entry and ledger_entry["sha256"] != download["sha256"]:
+                # A changed archive starts over from the scan
+                ledger_entry = None
+            elif completed:
+                if probe:
+                    self.record_stage(package_name, package_url, "probed", **probe_details)
+                raise PackageSkipped(f"Archive unchanged since an earlier run: {completed['outcome']}")
+
+        if probe:
+            self.record_stage(package_name, package_url, "probed", **probe_details)
+        # Publishers use the requested version or the resolved upstream commit as the published version, and notify the requestors
+        download["upstream_commit_sha"] = probe_details.get("commit_sha")
+        download["version"] = package["version"]
+        download["requestors"] = package["requestors"]
+
+        # The pre-scan always runs with the current rules, and its result picks the scan type an earlier scan must cover to be reused
+        pre_scan = self.pre_scan(package_name, download["file_name"], metrics)
+        pre_scan_rejected = bool(pre_scan and pre_scan["rejected"])
+        scan_type = self.choose_scan_type(pre_scan, package["scan_type"])
+
+        # Reuse a scan verdict recorded by an earlier run or cached for an identical archive, otherwise perform CodeGuru Security Scans
+        scanned = completed_stage(ledger_entry, "scanned")
+        if scanned and (not scanned.get("findings_complete", True) or bool(scanned.get("pre_scan_rejected")) != pre_scan_rejected):
+            # Findings cut short by FindingsEarlyExit are fetched again, so the current blocking severities see every finding; a
+            # verdict from the pre-scan rules of an earlier run is replaced by the current pre-scan result
+            scanned = None
+        if scanned and not pre_scan_rejected and not self.covers_scan_type(scanned.get("scan_type"), scan_type):
+            scanned = None
+        cached_result = scanned
+        if not cached_result and not pre_scan_rejected and self.scan_result_cache:
+            cached_result = self.scan_result_cache.get(download["sha256"])
+            if cached_result and not self.covers_scan_type(cached_result["scan_type"], scan_type):
+                print(f"[{package_name}] Cached {cached_result['scan_type']} scan result does not cover a {scan_type} scan...")
+                cached_result = None
+
+        if cached_result:
+            print(f"[{package_name}] Reusing {'the earlier run' if scanned else 'cached'} scan result for SHA256 {download['sha256']} ({cached_result['verdict']})...")
+            findings = cached_result["findings"]
+            scan_type = cached_result.get("scan_type")
+        else:
+            findings = pre_scan["findings"] if pre_scan_rejected else None
+            scan_created = completed_stage(ledger_entry, "scan_created")
+            if scan_created and not pre_scan_rejected and self.covers_scan_type(scan_created.get("scan_type"), scan_type):
+                # The scan started by an earlier run kept running in CodeGuru Security, so wait for it instead of uploading again
+                print(f"[{package_name}] Resuming CodeGuru Security scan {scan_created['run_id']} started by an earlier run...")
+                try:
+                    findings = self.wait_for_scan(package_name, scan_created["run_id"], metrics)
+                    scan_type = scan_created["scan_type"]
+                except Exception as error:
+                    print(f"[{package_name}] Could not resume the earlier scan, starting a new one: {error}")
+
+            if findings is None:
+                scan_file_name = self.prepare_scan_archive(package_name, download["file_name"], metrics)
+                run_id = self.start_scan(package_name, scan_file_name, metrics, scan_type)
+                self.record_stage(package_name, package_url, "scan_created", run_id=run_id, scan_type=scan_type)
+                findings = self.wait_for_scan(package_name, run_id, metrics)
+
+        # Pre-scan rejections hold whatever the blocking severities are
+        if pre_scan_rejected:
+            has_blocking_severity, findings_complete = True, True
+        else:
+            has_blocking_severity, findings, findings_complete = self.evaluate(findings, metrics)
+        verdict = "Rejected" if has_blocking_severity else "Approved"
+
+        if not scanned:
+            self.record_stage(package_name, package_url, "scanned", verdict=verdict, findings=findings, findings_complete=findings_complete, pre_scan_rejected=pre_scan_rejected, scan_type=scan_type)
+        # Pre-scan rejections are not cached, as the pre-scan runs on every request anyway. Incomplete findings are never cached
+        if self.scan_result_cache and not cached_result and not pre_scan_rejected and findings_complete:
+            self.scan_result_cache.put(download["sha256"], verdict, findings, scan_type)
+
+        if has_blocking_severity:
+            self.notifier.add_rejected(package_name, findings, requestors=package["requestors"], metrics=metrics)
+            print(f"[{package_name}] Findings with blocking severities found. The requestor is notified with additional details.")
+            if not self.notifier.deferred:
+                self.record_stage(package_name, package_url, COMPLETED_STAGE, outcome="Rejected")
+            return "Rejected"
+
+        if not self.publishers:
+            # The recorded verdict lets a later publish run go straight to publishing
+            print(f"[{package_name}] No blocking severities found. Leaving the package for a publish run...")
+            return SCAN_ONLY_OUTCOME
+
+        # One scan feeds every destination; destinations an earlier run already published to are skipped
+        print(f"[{package_name}] No blocking severities found. Publishing to {self.name}...")
+        outcomes = []
+        for publisher in self.publishers:
+            published = completed_stage(ledger_entry, f"published:{publisher.name}")
+            if published:
+                print(f"[{package_name}] Already published to {publisher.name} by an earlier run...")
+                outcomes.append(published["outcome"])
+                # The earlier run published but never confirmed the approval reached the requestor, so it is sent again
+                if published.get("approval") and not completed_stage(ledger_entry, "notified"):
+                    self.notifier.add_approved(package_name, published["approval"]["subject"], published["approval"]["message"], requestors=package["requestors"], metrics=metrics)
+                continue
+
+            outcome, approval = publisher.publish(package_name, download, findings, metrics)
+            if not publisher.deferred:
+                self.record_published(package, publisher, outcome, approval, metrics)
+            outcomes.append(outcome)
+
+        outcome = "Approved, " + "; ".join(outcomes)
+        if not self.notifier.deferred and not any(publisher.deferred for publisher in self.publishers):
+            self.record_stage(package_name, package_url, COMPLETED_STAGE, outcome=outcome)
+        return outcome
+
+    # Method to record that a publisher published a package and queue its approval; the approval is recorded before it is sent,
+    # so a failed send or an interrupted build leaves it for the next run to send again
+    def record_published(self, package, publisher, outcome, approval, metrics):
+        self.record_stage(package["name"], package["url"], f"published:{publisher.name}", outcome=outcome, approval=approval)
+        if approval:
+            self.notifier.add_approved(package["name"], approval["subject"], approval["message"], requestors=package["requestors"], metrics=metrics)
+
+    # Method to process every package concurrently, finish deferred publishing, and report the results and metrics
+    def run(self, packages):
+        # Process external packages concurrently, highest priority first; one package failing does not stop the others
+        packages = sorted(packages, key=lambda package: -package["priority"])
+        print(f"Processing {len(packages)} packages with up to {self.settings.max_concurrency} at a time")
+        package_metrics = {package["name"]: PackageMetrics(package["name"]) for package in packages}
+        results = process_packages_concurrently(
+            packages,
+            lambda package: self.process_package(package, package_metrics[package["name"]]),
+            self.settings.max_concurrency,
+        )
+        if self.pre_scanner:
+            self.pre_scanner.close()
+
+        # Deferred publishers record their packages once the publishing lands, like the others do straight away
+        results_by_package = {result["package"]: result for result in results}
+        packages_by_name = {package["name"]: package for package in packages}
+        for publisher in self.publishers:
+            for package_name, published in publisher.finish(results_by_package, package_metrics).items():
+                try:
+                    self.record_published(packages_by_name[package_name], publisher, published["outcome"], published["approval"], package_metrics[package_name])
+                except Exception as error:
+                    result = results_by_package[package_name]
+                    result["status"] = "Failed"
+                    result["outcome"] = f"{result['outcome']}; failed to notify requestor of {publisher.name} publish: {error}"
+
+        # Send the held-back notifications as digests; the shared send is attributed to every package it covers
+        notify_start = time.perf_counter()
+        notified_packages, notification_errors = self.notifier.flush()
+        if not self.notifier.deferred:
+            # Package mode sends as it goes, and a failed send fails the package
+            notified_packages = {result["package"] for result in results if result["status"] == "Succeeded"}
+        notify_seconds = time.perf_counter() - notify_start
+        for result in results:
+            if self.notifier.deferred and result["status"] == "Succeeded" and result["outcome"] != SCAN_ONLY_OUTCOME:
+                package_metrics[result["package"]].record("notify", notify_seconds)
+            if result["package"] in notification_errors:
+                result["status"] = "Failed"
+                result["outcome"] = f"{result['outcome']}; failed to notify requestor: {notification_errors[result['package']]}"
+
+        # Packages with deferred publishing or notifications are only complete once they have been sent
+        if self.run_ledger:
+            for package in packages:
+                result = results_by_package[package["name"]]
+                if package["name"] in notified_packages:
+                    self.run_ledger.record_stage(package["name"], package["url"], "notified")
+                if result["status"] == "Succeeded" and result["outcome"] != SCAN_ONLY_OUTCOME:
+                    self.run_ledger.record_stage(package["name"], package["url"], COMPLETED_STAGE, outcome=result["outcome"])
+            self.run_ledger.sync()
+
+        print_results_summary(results)
+
+        # Emit one metrics record per package and a summary table of where the time went
+        write_metrics_records(package_metrics, results, self.settings.metrics_namespace, self.name, self.settings.metrics_file)
+        print_metrics_summary(package_metrics, results)
+        return results
+
+# Method to build the shared clients, cache, poller, and publishers from the settings and return the pipeline
+def create_pipeline(settings):
+    from scan_pipeline.cache import create_scan_result_cache
+    from scan_pipeline.ledger import create_run_ledger
+    from scan_pipeline.notifications import NotificationAggregator
+    from scan_pipeline.poller import ScanPoller
+    from scan_pipeline.prescan import PreScanner
+    from scan_pipeline.probe import UpstreamProbe
+    from scan_pipeline.publishers import create_publishers
+    from scan_pipeline.transport import HttpTransport, create_boto3_config, create_lazy_boto3_client
+
+    # Configure boto3 clients and the HTTP transport, with connection pools sized for the worker pool; each client is created on first use
+    boto3_config = create_boto3_config(
+        pool_size=settings.http_pool_size,
+        connect_timeout=settings.http_connect_timeout_seconds,
+        read_timeout=settings.http_read_timeout_seconds,
+        max_attempts=settings.http_max_retries,
+    )
+    http_transport = HttpTransport(
+        pool_size=settings.http_pool_size,
+        connect_timeout=settings.http_connect_timeout_seconds,
+        read_timeout=settings.http_read_timeout_seconds,
+        max_retries=settings.http_max_retries,
+    )
+    codeguru_security_client = create_lazy_boto3_client('codeguru-security', boto3_config)
+    s3_client = create_lazy_boto3_client('s3', boto3_config)
+
+    # Open the scan result cache keyed by archive SHA256
+    scan_result_cache = create_scan_result_cache(settings.scan_cache_path, settings.scan_cache_ttl_seconds, settings.scan_cache_max_entries)
+
+    # Share one scan poller so every in-flight scan is polled from a single loop with backoff
+    scan_poller = ScanPoller(
+        codeguru_security_client,
+        initial_interval=settings.scan_poll_initial_seconds,
+        max_interval=settings.scan_poll_max_seconds,
+        max_wait_seconds=settings.scan_wait_timeout_seconds,
+    )
+
+    # Open the run ledger that lets this build skip completed requests and resume interrupted ones
+    run_ledger = create_run_ledger(
+        settings.run_ledger_path,
+        settings.run_ledger_s3_uri,
+        s3_client if settings.run_ledger_s3_uri else None,
+        settings.run_ledger_sync_seconds,
+    )
+
+    # Check upstream archives for changes with conditional requests before downloading them
+    upstream_probe = UpstreamProbe(http_transport, settings.upstream_github_token) if settings.upstream_probe else None
+
+    # Apply the fast local rules to every archive before it is uploaded, spreading larger archives across worker processes
+    pre_scanner = None
+    if settings.pre_scan:
+        pre_scanner = PreScanner(
+            blocked_patterns=settings.pre_scan_blocked_patterns,
+            flag_patterns=settings.pre_scan_flag_patterns,
+            secret_action=settings.pre_scan_secret_action,
+            secret_ignore_patterns=settings.pre_scan_secret_ignore_patterns,
+            max_archive_bytes=settings.pre_scan_max_archive_bytes,
+            max_uncompressed_bytes=settings.pre_scan_max_uncompressed_bytes,
+            max_entry_bytes=settings.pre_scan_max_entry_bytes,
+            workers=settings.pre_scan_workers,
+        )
+
+    # Collect approvals and rejections into digests, spilling oversized reports to a file or Amazon S3
+    notifier = NotificationAggregator(
+        create_lazy_boto3_client('sns', boto3_config),
+        settings.sns_topic_arn,
+        mode=settings.notification_mode,
+        max_concurrency=settings.max_concurrency,
+        s3_client=s3_client if settings.notification_report_s3_uri else None,
+        report_s3_uri=settings.notification_report_s3_uri,
+    )
+
+    publishers = create_publishers(settings, notifier, scan_result_cache, boto3_config)
+    return ScanPipeline(settings, codeguru_security_client, notifier, http_transport, scan_result_cache, scan_poller, publishers, run_ledger, upstream_probe, pre_scanner)
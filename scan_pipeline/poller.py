@@ -0,0 +1,126 @@
+import heapq
+import random
+import threading
+import time
+from scan_pipeline.retry import is_throttling_error
+
+# Waits for many CodeGuru Security scans from a single polling loop, backing off with jitter between get_scan calls
+class ScanPoller:
+
+    def __init__(self, codeguru_security_client, initial_interval=5, max_interval=30, backoff_factor=1.5, jitter=0.25, max_wait_seconds=3600):
+        self.codeguru_security_client = codeguru_security_client
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.max_wait_seconds = max_wait_seconds
+
+        # Number of get_scan calls made for each runId, kept after the scan completes
+        self.poll_counts = {}
+
+        self.condition = threading.Condition()
+        self.scans = {}
+        self.schedule = []
+        self.throttled_until = 0
+        self.thread = None
+
+    # Method to wait for a scan to leave the InProgress state and return the final get_scan response
+    def wait(self, scan_name, run_id):
+        return self.wait_all([(scan_name, run_id)])[run_id]
+
+    # Method to wait for several scans at once and return the final get_scan response for each runId
+    def wait_all(self, scans):
+        now = time.monotonic()
+        registered = []
+
+        with self.condition:
+            for scan_name, run_id in scans:
+                scan = {
+                    "scan_name": scan_name,
+                    "run_id": run_id,
+                    "interval": self.initial_interval,
+                    "deadline": now + self.max_wait_seconds,
+                    "done": threading.Event(),
+                    "response": None,
+                    "error": None,
+                }
+                self.scans[run_id] = scan
+                self.poll_counts[run_id] = 0
+                # Poll once right away so scans that finished already are not delayed
+                heapq.heappush(self.schedule, (now, run_id))
+                registered.append(scan)
+
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._poll_loop, name="scan-poller", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+        responses = {}
+        for scan in registered:
+            scan["done"].wait()
+            if scan["error"]:
+                raise scan["error"]
+            responses[scan["run_id"]] = scan["response"]
+
+        return responses
+
+    # Method returning the delay before the next poll of a scan and backing off its interval
+    def _next_delay(self, scan):
+        delay = scan["interval"] * random.uniform(1 - self.jitter, 1 + self.jitter)
+        scan["interval"] = min(scan["interval"] * self.backoff_factor, self.max_interval)
+        return delay
+
+    # Single loop polling every in-flight scan when its next poll is due
+    def _poll_loop(self):
+        while True:
+            with self.condition:
+                while True:
+                    if not self.schedule:
+                        self.condition.wait()
+                        continue
+                    due_at, run_id = self.schedule[0]
+                    delay = max(due_at, self.throttled_until) - time.monotonic()
+                    if delay <= 0:
+                        heapq.heappop(self.schedule)
+                        scan = self.scans[run_id]
+                        break
+                    self.condition.wait(delay)
+
+            self._poll(scan)
+
+    # Method to poll a single scan once and either complete it or schedule its next poll
+    def _poll(self, scan):
+        now = time.monotonic()
+        finished = False
+
+        try:
+            self.poll_counts[scan["run_id"]] += 1
+            get_scan_response = self.codeguru_security_client.get_scan(scanName=scan["scan_name"], runId=scan["run_id"])
+
+            if get_scan_response["scanState"] != "InProgress":
+                scan["response"] = get_scan_response
+                finished = True
+
+        except Exception as error:
+            if is_throttling_error(error):
+                # Slow down every scan, not just this one, until the throttling clears
+                scan["interval"] = min(scan["interval"] * 2, self.max_interval)
+                with self.condition:
+                    self.throttled_until = max(self.throttled_until, now + scan["interval"])
+            else:
+                scan["error"] = error
+                finished = True
+
+        if not finished and now >= scan["deadline"]:
+            scan["error"] = TimeoutError(f"CodeGuru Scan {scan['scan_name']} did not complete within {self.max_wait_seconds} seconds")
+            finished = True
+
+        if finished:
+            with self.condition:
+                del self.scans[scan["run_id"]]
+            scan["done"].set()
+            return
+
+        next_poll_at = now + self._next_delay(scan)
+        with self.condition:
+            heapq.heappush(self.schedule, (next_poll_at, scan["run_id"]))
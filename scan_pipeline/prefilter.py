@@ -0,0 +1,92 @@
+import fnmatch
+import json
+import os
+import shutil
+import zipfile
+
+# Archive entries dropped from the scan archive by default: images, media, fonts, documents, nested archives, and compiled binaries
+DEFAULT_EXCLUDE_PATTERNS = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.bmp", "*.ico", "*.webp", "*.tif", "*.tiff", "*.psd",
+    "*.mp3", "*.mp4", "*.wav", "*.avi", "*.mov", "*.webm",
+    "*.ttf", "*.otf", "*.woff", "*.woff2", "*.eot",
+    "*.pdf", "*.doc", "*.docx", "*.ppt", "*.pptx", "*.xls", "*.xlsx",
+    "*.zip", "*.tar", "*.gz", "*.tgz", "*.bz2", "*.xz", "*.7z", "*.rar", "*.whl", "*.egg",
+    "*.so", "*.dll", "*.dylib", "*.exe", "*.bin", "*.o", "*.a", "*.lib", "*.pyc", "*.pyd", "*.class", "*.jar",
+    "*.pkl", "*.pickle", "*.npy", "*.npz", "*.h5", "*.onnx", "*.pt", "*.parquet",
+)
+
+# Size of the buffer used to copy entries between archives
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Method to parse a comma-separated list of glob patterns
+def parse_patterns(value, default=()):
+    if value is None:
+        return tuple(default)
+
+    return tuple(pattern.strip() for pattern in value.split(",") if pattern.strip())
+
+# Method to check whether an archive entry path matches any of the glob patterns, ignoring case
+def matches_any(path, patterns):
+    path = path.lower()
+    return any(fnmatch.fnmatchcase(path, pattern.lower()) for pattern in patterns)
+
+# Method to clear cell outputs from a notebook entry, returning the slimmed notebook content
+def strip_notebook_outputs(content):
+    notebook = json.loads(content)
+
+    for cell in notebook.get("cells", []):
+        if cell.get("cell_type") == "code":
+            cell["outputs"] = []
+            cell["execution_count"] = None
+
+    return json.dumps(notebook, indent=1).encode("utf-8")
+
+# Method to stream a slimmed copy of an archive for scanning, keeping only source entries and never extracting to disk
+def build_scan_archive(file_name, scan_file_name, include_patterns=(), exclude_patterns=DEFAULT_EXCLUDE_PATTERNS, max_entry_bytes=5 * 1024 * 1024, strip_notebooks=True):
+    stats = {
+        "file_name": scan_file_name,
+        "entries_total": 0,
+        "entries_kept": 0,
+        "entries_dropped": 0,
+        "bytes_in": os.path.getsize(file_name),
+    }
+
+    directory = os.path.dirname(scan_file_name)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with zipfile.ZipFile(file_name) as source_archive, zipfile.ZipFile(scan_file_name, "w", compression=zipfile.ZIP_DEFLATED) as scan_archive:
+        for entry in source_archive.infolist():
+            if entry.is_dir():
+                continue
+            stats["entries_total"] += 1
+
+            keep = (
+                entry.file_size <= max_entry_bytes
+                and (not include_patterns or matches_any(entry.filename, include_patterns))
+                and not matches_any(entry.filename, exclude_patterns)
+            )
+            if not keep:
+                stats["entries_dropped"] += 1
+                continue
+
+            scan_entry = zipfile.ZipInfo(entry.filename, date_time=entry.date_time)
+            scan_entry.compress_type = zipfile.ZIP_DEFLATED
+            scan_entry.external_attr = entry.external_attr
+
+            if strip_notebooks and entry.filename.lower().endswith(".ipynb"):
+                # Notebooks are bounded by max_entry_bytes, so they are small enough to rewrite in memory
+                try:
+                    content = strip_notebook_outputs(source_archive.read(entry))
+                except ValueError:
+                    content = source_archive.read(entry)
+                scan_archive.writestr(scan_entry, content)
+            else:
+                with source_archive.open(entry) as source_entry, scan_archive.open(scan_entry, "w", force_zip64=entry.file_size >= zipfile.ZIP64_LIMIT) as scan_entry_file:
+                    shutil.copyfileobj(source_entry, scan_entry_file, COPY_BUFFER_SIZE)
+
+            stats["entries_kept"] += 1
+
+    stats["bytes_out"] = os.path.getsize(scan_file_name)
+    stats["bytes_saved"] = stats["bytes_in"] - stats["bytes_out"]
+    return stats
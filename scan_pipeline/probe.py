@@ -0,0 +1,83 @@
+import re
+
+# GitHub archive URLs such as https://github.com/owner/repo/archive/refs/heads/main.zip or https://codeload.github.com/owner/repo/zip/refs/tags/v1.0
+GITHUB_ARCHIVE_URL_PATTERNS = (
+    re.compile(r"^https://github\.com/(?P<owner>[^/]+)/(?P<repo>[^/]+)/archive/(?:refs/(?:heads|tags)/)?(?P<ref>.+)\.zip$"),
+    re.compile(r"^https://codeload\.github\.com/(?P<owner>[^/]+)/(?P<repo>[^/]+)/zip/(?:refs/(?:heads|tags)/)?(?P<ref>.+)$"),
+)
+
+# Full commit SHAs; an archive URL that already names one never changes
+COMMIT_SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+
+# Method to split a GitHub archive URL into its owner, repository, and branch, tag, or commit reference
+def parse_github_archive_url(url):
+    for pattern in GITHUB_ARCHIVE_URL_PATTERNS:
+        match = pattern.match(url)
+        if match:
+            return match.group("owner"), match.group("repo"), match.group("ref")
+
+    return None
+
+# Checks whether an upstream archive changed since it was last processed, without downloading it
+class UpstreamProbe:
+
+    def __init__(self, http_transport, github_token=None, github_api_url="https://api.github.com"):
+        self.http_transport = http_transport
+        self.github_token = github_token
+        self.github_api_url = github_api_url.rstrip("/")
+
+    # Method to probe an upstream archive URL, comparing it with the probe recorded by an earlier run
+    def probe(self, url, previous_probe=None):
+        previous_probe = previous_probe or {}
+        github_archive = parse_github_archive_url(url)
+
+        if github_archive:
+            probe = self._probe_github_archive(*github_archive, previous_probe)
+        else:
+            probe = self._probe_http(url, previous_probe)
+
+        # Without a commit SHA or HTTP validator there is nothing to compare, so the archive is treated as changed
+        fingerprint = probe.get("commit_sha") or probe.get("etag") or probe.get("last_modified")
+        previous_fingerprint = previous_probe.get("commit_sha") or previous_probe.get("etag") or previous_probe.get("last_modified")
+        probe["changed"] = not fingerprint or fingerprint != previous_fingerprint
+        return probe
+
+    # Method to resolve a GitHub branch or tag to its commit with a conditional request that costs no rate limit when nothing changed
+    def _probe_github_archive(self, owner, repo, ref, previous_probe):
+        if COMMIT_SHA_PATTERN.match(ref):
+            return {"commit_sha": ref, "download_url": f"https://github.com/{owner}/{repo}/archive/{ref}.zip"}
+
+        headers = {"Accept": "application/vnd.github.sha"}
+        if self.github_token:
+            headers["Authorization"] = f"token {self.github_token}"
+        if previous_probe.get("commit_etag"):
+            headers["If-None-Match"] = previous_probe["commit_etag"]
+
+        response = self.http_transport.request("GET", f"{self.github_api_url}/repos/{owner}/{repo}/commits/{ref}", headers=headers)
+        if response.status_code == 304:
+            commit_sha = previous_probe["commit_sha"]
+        else:
+            response.raise_for_status()
+            commit_sha = response.text.strip()
+
+        # Download the archive of the resolved commit, so the scanned and published archive is the pinned commit even if the branch moves on
+        return {
+            "commit_sha": commit_sha,
+            "commit_etag": response.headers.get("ETag") or previous_probe.get("commit_etag"),
+            "download_url": f"https://github.com/{owner}/{repo}/archive/{commit_sha}.zip",
+        }
+
+    # Method to compare the HTTP validators of an archive URL with a conditional HEAD request
+    def _probe_http(self, url, previous_probe):
+        headers = {}
+        if previous_probe.get("etag"):
+            headers["If-None-Match"] = previous_probe["etag"]
+        if previous_probe.get("last_modified"):
+            headers["If-Modified-Since"] = previous_probe["last_modified"]
+
+        response = self.http_transport.request("HEAD", url, headers=headers)
+        if response.status_code == 304:
+            return {"etag": previous_probe.get("etag"), "last_modified": previous_probe.get("last_modified")}
+
+        response.raise_for_status()
+        return {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
@@ -0,0 +1,43 @@
+# Interface for backends that publish approved packages; an S3 backend implements the same methods
+class PackagePublisher:
+
+    # Name used in package outcomes and the metrics pipeline dimension
+    name = None
+
+    # Whether publish() only stages the package and finish() completes publishing
+    deferred = False
+
+    # Method to publish, or stage for publishing, an approved package and return its outcome and the approval notification
+    # (subject and message) to send the requestor, or None when finish() notifies the requestor
+    def publish(self, package_name, download, findings, metrics):
+        raise NotImplementedError
+
+    # Method to complete any publishing deferred until every package is processed, updating the package results in place, and return
+    # the outcome and approval notification of each package it published, by package name
+    def finish(self, results_by_package, package_metrics):
+        return {}
+
+# Method to create the publishers named in the settings; backend modules are imported only when selected and clients created on first use
+def create_publishers(settings, notifier, scan_result_cache, boto3_config):
+    from scan_pipeline.transport import LazyClient, create_lazy_boto3_client
+
+    publishers = []
+
+    for publisher_name in settings.publishers:
+        if publisher_name == "codeartifact":
+            from scan_pipeline.codeartifact import CodeArtifactPublisher
+
+            codeartifact_client = create_lazy_boto3_client("codeartifact", boto3_config)
+            publishers.append(CodeArtifactPublisher(settings, codeartifact_client, notifier, scan_result_cache))
+
+        elif publisher_name == "github":
+            from scan_pipeline.github_publisher import GitHubPublisher
+
+            # PyGithub is imported with the client, once the first approved package is staged
+            def create_github():
+                from github import Github
+                return Github(settings.github_token, timeout=int(settings.http_read_timeout_seconds), pool_size=settings.http_pool_size)
+
+            publishers.append(GitHubPublisher(settings, LazyClient(create_github), notifier, scan_result_cache))
+
+    return publishers
@@ -0,0 +1,10 @@
+# Error codes returned by AWS APIs when requests are being throttled
+THROTTLING_ERROR_CODES = ("ThrottlingException", "Throttling", "TooManyRequestsException", "RequestLimitExceeded")
+
+# Method to return the error code of an exception raised by a boto3 client, or None
+def error_code(error):
+    return getattr(error, "response", {}).get("Error", {}).get("Code")
+
+# Method to check whether an exception raised by a boto3 client is a throttling error
+def is_throttling_error(error):
+    return error_code(error) in THROTTLING_ERROR_CODES
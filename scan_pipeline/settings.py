@@ -0,0 +1,158 @@
+import os
+from scan_pipeline.findings import DEFAULT_BLOCKING_SEVERITIES, parse_severities
+from scan_pipeline.notifications import NOTIFICATION_MODES
+from scan_pipeline.prefilter import DEFAULT_EXCLUDE_PATTERNS, parse_patterns
+from scan_pipeline.prescan import DEFAULT_BLOCKED_PATTERNS, DEFAULT_FLAG_PATTERNS, DEFAULT_SECRET_IGNORE_PATTERNS, SECRET_ACTIONS
+
+# Backends that can publish approved packages, selected with the PackagePublishers environment variable
+PUBLISHER_NAMES = ("codeartifact", "github")
+
+# Method to parse a comma-separated publisher list such as "codeartifact,github"
+def parse_publishers(value, default=("codeartifact",)):
+    if not value:
+        return tuple(default)
+
+    publishers = tuple(dict.fromkeys(name.strip().lower() for name in value.split(",") if name.strip()))
+    unknown_publishers = [name for name in publishers if name not in PUBLISHER_NAMES]
+    if unknown_publishers:
+        raise ValueError(f"Unknown package publishers {', '.join(unknown_publishers)}; expected any of {', '.join(PUBLISHER_NAMES)}")
+
+    return publishers
+
+# CodeGuru Security scan types selected with the ScanType environment variable; auto runs Express scans for packages the pre-scan found low risk
+SCAN_TYPES = ("Standard", "Express", "auto")
+
+# Method to parse a scan type name in any letter case
+def parse_scan_type(value, default="Standard"):
+    if not value:
+        return default
+
+    scan_types = {scan_type.lower(): scan_type for scan_type in SCAN_TYPES}
+    if value.strip().lower() not in scan_types:
+        raise ValueError(f"Unknown scan type {value}; expected one of {', '.join(SCAN_TYPES)}")
+
+    return scan_types[value.strip().lower()]
+
+# Build configuration read from the CodeBuild environment variables
+class PipelineSettings:
+
+    def __init__(self, environ=None, default_publishers=("codeartifact",)):
+        environ = os.environ if environ is None else environ
+
+        self.publishers = parse_publishers(environ.get("PackagePublishers"), default_publishers)
+        self.region_name = environ.get("AWS_REGION")
+        self.sns_topic_arn = environ.get("SNSTopic")
+
+        # CodeArtifact publisher
+        self.codeartifact_domain = environ.get("ExampleDomain")
+        self.codeartifact_repo = environ.get("InternalRepository")
+        self.publish_findings_asset = environ.get("PublishFindingsAsset", "true").lower() == "true"
+
+        # GitHub publisher
+        self.github_repo = environ.get("PrivateGitHubRepo")
+        self.github_owner = environ.get("PrivateGitHubOwner")
+        self.github_username = environ.get("PrivateGitHubUsername")
+        self.github_email = environ.get("PrivateGitHubEmail")
+        self.github_token = environ.get("PrivateGitHubToken")
+        self.github_package_branch = environ.get("PrivateGitHubPackageBranch")
+
+        # Upstream change detection
+        self.upstream_probe = environ.get("UpstreamProbe", "true").lower() == "true"
+        self.upstream_github_token = environ.get("UpstreamGitHubToken") or self.github_token
+
+        # Concurrency and HTTP transport
+        self.max_concurrency = int(environ.get("MaxConcurrency", "4"))
+        self.http_pool_size = int(environ.get("HttpPoolSize", str(max(10, self.max_concurrency * 2))))
+        self.http_connect_timeout_seconds = float(environ.get("HttpConnectTimeoutSeconds", "10"))
+        self.http_read_timeout_seconds = float(environ.get("HttpReadTimeoutSeconds", "120"))
+        self.http_max_retries = int(environ.get("HttpMaxRetries", "5"))
+
+        # Scan result cache
+        self.scan_cache_path = environ.get("ScanCachePath", "scan-result-cache.sqlite")
+        self.scan_cache_ttl_seconds = int(environ.get("ScanCacheTtlSeconds", str(7 * 24 * 60 * 60)))
+        self.scan_cache_max_entries = int(environ.get("ScanCacheMaxEntries", "1000"))
+
+        # Run ledger
+        self.run_ledger_path = environ.get("RunLedgerPath", "run-ledger.sqlite")
+        self.run_ledger_s3_uri = environ.get("RunLedgerS3Uri")
+        self.run_ledger_sync_seconds = float(environ.get("RunLedgerSyncSeconds", "60"))
+
+        # Scan archive, polling, and findings gate
+        self.scan_archive_filter = environ.get("ScanArchiveFilter", "true").lower() == "true"
+        self.scan_include_patterns = parse_patterns(environ.get("ScanIncludePatterns"))
+        self.scan_exclude_patterns = parse_patterns(environ.get("ScanExcludePatterns"), DEFAULT_EXCLUDE_PATTERNS)
+        self.scan_max_entry_bytes = int(environ.get("ScanMaxEntryBytes", str(5 * 1024 * 1024)))
+        self.scan_poll_initial_seconds = float(environ.get("ScanPollInitialSeconds", "5"))
+        self.scan_poll_max_seconds = float(environ.get("ScanPollMaxSeconds", "30"))
+        self.scan_wait_timeout_seconds = float(environ.get("ScanWaitTimeoutSeconds", "3600"))
+        try:
+            self.blocking_severities = parse_severities(environ.get("BlockingSeverities"))
+            self.blocking_severities_problem = None
+        except ValueError as error:
+            # The default severities stay in force so the gate never fails open, and validate() reports the problem
+            self.blocking_severities = DEFAULT_BLOCKING_SEVERITIES
+            self.blocking_severities_problem = f"BlockingSeverities: {error}"
+        self.findings_early_exit = environ.get("FindingsEarlyExit", "false").lower() == "true"
+        self.scan_type = parse_scan_type(environ.get("ScanType"))
+
+        # Local pre-scan
+        self.pre_scan = environ.get("PreScan", "true").lower() == "true"
+        self.pre_scan_secret_action = environ.get("PreScanSecretAction", "reject").lower()
+        self.pre_scan_blocked_patterns = parse_patterns(environ.get("PreScanBlockedPatterns"), DEFAULT_BLOCKED_PATTERNS)
+        self.pre_scan_flag_patterns = parse_patterns(environ.get("PreScanFlagPatterns"), DEFAULT_FLAG_PATTERNS)
+        self.pre_scan_secret_ignore_patterns = parse_patterns(environ.get("PreScanSecretIgnorePatterns"), DEFAULT_SECRET_IGNORE_PATTERNS)
+        self.pre_scan_max_archive_bytes = int(environ.get("PreScanMaxArchiveBytes", str(1024 ** 3)))
+        self.pre_scan_max_uncompressed_bytes = int(environ.get("PreScanMaxUncompressedBytes", str(4 * 1024 ** 3)))
+        self.pre_scan_max_entry_bytes = int(environ.get("PreScanMaxEntryBytes", str(1024 * 1024)))
+        self.pre_scan_workers = int(environ.get("PreScanWorkers", str(os.cpu_count() or 1)))
+
+        # Notifications
+        self.notification_mode = environ.get("NotificationMode", "run").lower()
+        self.notification_report_s3_uri = environ.get("NotificationReportS3Uri")
+
+        # Metrics
+        self.metrics_namespace = environ.get("MetricsNamespace", "ExternalPackageSecurityScan")
+        self.metrics_file = environ.get("MetricsFile", "scan-metrics.jsonl")
+
+    # Method to print the settings that identify the publishing destinations, leaving out secrets
+    def print_summary(self):
+        print("Package Publishers: ", ", ".join(self.publishers) or "none (scan only)")
+        print("AWS REGION: ", self.region_name)
+        if "codeartifact" in self.publishers:
+            print("CodeArtifact Domain: ", self.codeartifact_domain)
+            print("CodeArtifact Repo: ", self.codeartifact_repo)
+        if "github" in self.publishers:
+            print("Private GitHub Repo: ", self.github_repo)
+            print("Private GitHub Owner: ", self.github_owner)
+            print("Private GitHub Username: ", self.github_username)
+            print("Private GitHub Email: ", self.github_email)
+
+    # Method to return the settings problems that would fail a run, checking the publisher settings only for the selected publishers
+    def validate(self):
+        problems = []
+
+        if not self.sns_topic_arn:
+            problems.append("SNSTopic is not set, so requestors cannot be notified")
+        if self.blocking_severities_problem:
+            problems.append(self.blocking_severities_problem)
+        if self.notification_mode not in NOTIFICATION_MODES:
+            problems.append(f"NotificationMode {self.notification_mode} is not one of {', '.join(NOTIFICATION_MODES)}")
+        for name, value in (("RunLedgerS3Uri", self.run_ledger_s3_uri), ("NotificationReportS3Uri", self.notification_report_s3_uri)):
+            if value and not value.startswith("s3://"):
+                problems.append(f"{name} {value} is not an s3:// URI")
+        if self.pre_scan and self.pre_scan_secret_action not in SECRET_ACTIONS:
+            problems.append(f"PreScanSecretAction {self.pre_scan_secret_action} is not one of {', '.join(SECRET_ACTIONS)}")
+        if self.scan_type == "auto" and not self.pre_scan:
+            problems.append("ScanType auto needs PreScan, which picks the scan type of each package")
+        if self.max_concurrency < 1:
+            problems.append("MaxConcurrency must be at least 1")
+        if self.upstream_probe and not self.upstream_github_token:
+            # Not a problem, but unauthenticated GitHub API requests are limited to 60 an hour, and their 304 responses count too
+            print("Warning: UpstreamProbe is on without UpstreamGitHubToken or PrivateGitHubToken, so GitHub commit lookups are limited to 60 requests an hour")
+
+        if "codeartifact" in self.publishers:
+            problems.extend(f"{name} is not set for the codeartifact publisher" for name, value in (("ExampleDomain", self.codeartifact_domain), ("InternalRepository", self.codeartifact_repo)) if not value)
+        if "github" in self.publishers:
+            problems.extend(f"{name} is not set for the github publisher" for name, value in (("PrivateGitHubRepo", self.github_repo), ("PrivateGitHubOwner", self.github_owner), ("PrivateGitHubToken", self.github_token)) if not value)
+
+        return problems
@@ -0,0 +1,19 @@
+import os
+import sqlite3
+import threading
+
+# SQLite database holding one table, opened once and shared by the package worker threads
+class SqliteStore:
+
+    def __init__(self, path, create_table_sql):
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The connection may be used from any worker thread; callers hold self.lock around every statement and commit
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(create_table_sql)
+        self.connection.commit()
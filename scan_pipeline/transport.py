@@ -0,0 +1,150 @@
+import hashlib
+import random
+import threading
+import time
+import requests
+from botocore.config import Config
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# HTTP status codes retried for every outbound request
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Shared HTTP transport with keep-alive connection pooling, timeouts, and retries for package downloads and presigned uploads
+class HttpTransport:
+
+    def __init__(self, pool_size=10, connect_timeout=10, read_timeout=120, max_retries=5, backoff_factor=1, chunk_size=1024 * 1024):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.chunk_size = chunk_size
+
+        # Connection-level retries for idempotent reads; uploads are retried in upload_file so the body can be reopened
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+
+        # pool_block caps the open connections to each host at pool_size
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry, pool_block=True)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # Method to sleep before the next attempt with exponential backoff and jitter
+    def _backoff(self, attempt):
+        time.sleep(self.backoff_factor * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+    # Method to send a small request, such as a HEAD or API call, through the pooled session with timeouts and retries
+    def request(self, method, url, headers=None):
+        return self.session.request(method, url, headers=headers, timeout=self.timeout, allow_redirects=True)
+
+    # Method to stream a file to disk while computing its SHA256 hash and size, resuming interrupted transfers with Range requests
+    def download_file(self, url, file_name):
+        sha256 = hashlib.sha256()
+        size = 0
+        content_type = None
+        validator = None
+
+        with open(file_name, "wb") as download_file:
+            for attempt in range(1, self.max_retries + 2):
+                # A transfer is only resumed while the server still serves the same archive; without a validator it starts over
+                headers = {"Range": f"bytes={size}-", "If-Range": validator} if size and validator else {}
+
+                try:
+                    with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as download_response:
+                        download_response.raise_for_status()
+                        content_type = content_type or download_response.headers.get("Content-Type")
+
+                        if size and (download_response.status_code != 206 or response_validator(download_response) != validator):
+                            # The server ignored the Range header or the archive changed, so start over from the first byte
+                            print(f"Download of {url} cannot be resumed, starting over")
+                            download_file.seek(0)
+                            download_file.truncate()
+                            sha256 = hashlib.sha256()
+                            size = 0
+                        if not size:
+                            validator = response_validator(download_response)
+
+                        for chunk in download_response.iter_content(chunk_size=self.chunk_size):
+                            download_file.write(chunk)
+                            sha256.update(chunk)
+                            size += len(chunk)
+
+                    break
+
+                except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as error:
+                    if attempt > self.max_retries:
+                        raise
+                    print(f"Download of {url} interrupted after {size} bytes, {'resuming' if validator else 'starting over'} (attempt {attempt} of {self.max_retries}): {error}")
+                    self._backoff(attempt)
+
+        # Metadata reused by the upload and publish stages so the archive is never re-read to hash it
+        return {
+            "file_name": file_name,
+            "sha256": sha256.hexdigest(),
+            "size": size,
+            "content_type": content_type,
+        }
+
+    # Method to stream a file to a presigned URL with a PUT request, retrying 5xx responses and connection errors
+    def upload_file(self, url, file_name, headers=None):
+        for attempt in range(1, self.max_retries + 2):
+            try:
+                # The file is reopened on every attempt so a retry streams the body from the start again
+                with open(file_name, "rb") as upload_file:
+                    upload_response = self.session.put(url, headers=headers, data=upload_file, timeout=self.timeout)
+
+                if upload_response.status_code not in RETRY_STATUS_CODES or attempt > self.max_retries:
+                    return upload_response
+                print(f"Upload of {file_name} returned HTTP {upload_response.status_code}, retrying (attempt {attempt} of {self.max_retries})")
+
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt > self.max_retries:
+                    raise
+                print(f"Upload of {file_name} failed, retrying (attempt {attempt} of {self.max_retries}): {error}")
+
+            self._backoff(attempt)
+
+# Method to return the validator sent in If-Range to resume a download: a strong ETag, or else the Last-Modified date
+def response_validator(response):
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+
+    return response.headers.get("Last-Modified")
+
+# Method to build the boto3 client configuration with a connection pool sized for the worker pool, timeouts, and adaptive retries
+def create_boto3_config(pool_size=10, connect_timeout=10, read_timeout=120, max_attempts=5):
+    return Config(
+        max_pool_connections=pool_size,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        retries={"max_attempts": max_attempts, "mode": "adaptive"},
+    )
+
+# Client created on first use, so runs that skip every package never pay for the clients they do not call
+class LazyClient:
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return getattr(self._client, name)
+
+# Method to create a boto3 client for the service on first use; boto3 itself is imported then too
+def create_lazy_boto3_client(service_name, boto3_config):
+    def create_client():
+        import boto3
+        return boto3.client(service_name, config=boto3_config)
+
+    return LazyClient(create_client)